@@ -1,11 +1,84 @@
+from array import array
+
+
+class VisitedBitmap:
+    # set-like visited store: one byte per grid cell instead of a tuple
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.bits = bytearray(rows * cols)
+        self.count = 0
+
+    def __contains__(self, position):
+        r, c = position
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return False
+        return self.bits[r * self.cols + c] == 1
+
+    def add(self, position):
+        r, c = position
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise IndexError("position %s outside %dx%d grid" % ((r, c), self.rows, self.cols))
+        index = r * self.cols + c
+        if not self.bits[index]:
+            self.bits[index] = 1
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        index = self.bits.find(1)
+        while index != -1:
+            yield divmod(index, self.cols)
+            index = self.bits.find(1, index + 1)
+
+
+class PathBuffer:
+    # list-like path store keeping (row, col) pairs in one int32 array
+    def __init__(self):
+        self.coords = array("i")
+
+    def append(self, position):
+        self.coords.append(int(position[0]))
+        self.coords.append(int(position[1]))
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("path index out of range")
+        return (self.coords[2 * index], self.coords[2 * index + 1])
+
+    def __iter__(self):
+        coords = self.coords
+        for i in range(0, len(coords), 2):
+            yield (coords[i], coords[i + 1])
+
+
 class Agent:
 
-    def __init__(self, start_position):
+    def __init__(self, start_position, grid_shape=None, record_path=True):
         self.current_position = start_position
         self.active = True
         self.stop_reason = None
-        self.visited_positions = set()
-        self.path = []
+        if grid_shape is None:
+            self.visited_positions = set()
+            self.path = []
+        else:
+            self.visited_positions = VisitedBitmap(*grid_shape)
+            self.path = PathBuffer()
+        # streaming consumers (episode_stream.iter_steps) keep the trajectory
+        # themselves, so the agent can skip storing it
+        self.collected_positions = []
+        if not record_path:
+            self.path = None
+            self.collected_positions = None
         self.steps_taken = 0
         self.waste_collected = 0
         self.human_encounters = 0
@@ -14,7 +87,8 @@ class Agent:
 
     def _visit_position(self, position):
         self.visited_positions.add(position)
-        self.path.append(position)
+        if self.path is not None:
+            self.path.append(position)
 
     def update_position(self, new_position):
         self.current_position = new_position
@@ -22,7 +96,10 @@ class Agent:
         self._visit_position(new_position)
 
     def collect_waste(self):
+        # callers collect right after moving onto the cleaned cell
         self.waste_collected += 1
+        if self.collected_positions is not None:
+            self.collected_positions.append(self.current_position)
 
     def stop(self, reason):
         self.active = False
@@ -36,6 +113,8 @@ class Agent:
         return self.current_position
 
     def get_path(self):
+        if self.path is None:
+            return []
         return list(self.path)
 
     def get_statistics(self):
@@ -0,0 +1,187 @@
+import numpy as np
+from Layout import Layout
+
+
+class BatchSimulation:
+    def __init__(self, size, batch_size, bio_hazard_count=1000, human_count=30, seed=None):
+        self.size = size
+        self.batch_size = batch_size
+        self.bio_hazard_count = bio_hazard_count
+        self.human_count = human_count
+        self.rng = np.random.default_rng(seed)
+
+        layout = Layout(size)
+        self.layout = layout.grid.astype(np.int8)
+        self.free_cells = layout.free_cells
+        cells = size * size
+        self.cell_rows, self.cell_cols = np.divmod(np.arange(cells), size)
+        self.cell_rows32 = self.cell_rows.astype(np.int32)
+        self.cell_cols32 = self.cell_cols.astype(np.int32)
+        # flat-index deltas in Action order: UP, DOWN, LEFT, RIGHT
+        self.offsets = np.array([-size, size, -1, 1])
+
+        self.grids = np.empty((batch_size, size, size), dtype=np.int8)
+        self.flat = self.grids.reshape(batch_size, cells)
+        self.visited = np.zeros((batch_size, cells), dtype=bool)
+        self.positions = np.zeros(batch_size, dtype=np.int64)
+        self.running = np.zeros(batch_size, dtype=bool)
+        self.ticks = np.zeros(batch_size, dtype=np.int64)
+        self.steps_taken = np.zeros(batch_size, dtype=np.int64)
+        self.waste_collected = np.zeros(batch_size, dtype=np.int64)
+        self.human_encounters = np.zeros(batch_size, dtype=np.int64)
+        self.alternative_paths_used = np.zeros(batch_size, dtype=np.int64)
+
+    def reset(self):
+        self.grids[:] = self.layout
+        self.visited[:] = False
+        self.ticks[:] = 0
+        self.steps_taken[:] = 0
+        self.waste_collected[:] = 0
+        self.human_encounters[:] = 0
+        self.alternative_paths_used[:] = 0
+
+        free = self.free_cells
+        hazards = min(max(int(self.bio_hazard_count), 0), len(free))
+        humans = min(max(int(self.human_count), 0), len(free) - hazards)
+        picked = hazards + humans
+        if picked >= len(free):
+            # no clean cell left for the agent, Main.run skips these episodes
+            self.flat[:, free[:hazards]] = 1
+            self.flat[:, free[hazards:picked]] = 3
+            self.running[:] = False
+            return
+
+        # the first hazards + humans + 1 cells of a random permutation of the
+        # free cells: hazards, then humans among the rest, then the start cell
+        keys = self.rng.random((self.batch_size, len(free)))
+        chosen = np.argpartition(keys, picked, axis=1)[:, :picked + 1]
+        order = np.argsort(np.take_along_axis(keys, chosen, axis=1), axis=1)
+        chosen = free[np.take_along_axis(chosen, order, axis=1)]
+
+        rows = np.arange(self.batch_size)[:, None]
+        self.flat[rows, chosen[:, :hazards]] = 1
+        self.flat[rows, chosen[:, hazards:picked]] = 3
+        self.positions[:] = chosen[:, picked]
+        self.visited[rows[:, 0], self.positions] = True
+        self.running[:] = True
+
+    def load_episode(self, index, grid, start):
+        self.grids[index] = grid
+        self.visited[index] = False
+        self.positions[index] = start[0] * self.size + start[1]
+        self.visited[index, self.positions[index]] = True
+        self.running[index] = True
+        self.ticks[index] = 0
+        self.steps_taken[index] = 0
+        self.waste_collected[index] = 0
+        self.human_encounters[index] = 0
+        self.alternative_paths_used[index] = 0
+
+    def _neighbours(self, episodes):
+        pos = self.positions[episodes]
+        rows, cols = self.cell_rows[pos], self.cell_cols[pos]
+        inside = np.stack(
+            [rows > 0, rows < self.size - 1, cols > 0, cols < self.size - 1], axis=1)
+        neigh = np.where(inside, pos[:, None] + self.offsets, pos[:, None])
+        cells = self.flat[episodes[:, None], neigh]
+        return neigh, inside, cells
+
+    def _alternative_moves(self, episodes):
+        # vectorised human_avoidance.handle_human_encounter: step towards the
+        # Manhattan-nearest hazard (first in row-major order on ties)
+        pos = self.positions[episodes]
+        ar, ac = self.cell_rows[pos], self.cell_cols[pos]
+        hazard = self.flat[episodes] == 1
+        dist = (np.abs(self.cell_rows32 - ar[:, None].astype(np.int32)) +
+                np.abs(self.cell_cols32 - ac[:, None].astype(np.int32)))
+        dist[~hazard] = np.iinfo(np.int32).max
+        nearest = np.argmin(dist, axis=1)
+        found = hazard[np.arange(len(episodes)), nearest]
+
+        sdr = np.sign(self.cell_rows[nearest] - ar)
+        sdc = np.sign(self.cell_cols[nearest] - ac)
+        cands = np.stack([pos + sdr * self.size, pos + sdc,
+                          pos + sdr * self.size + sdc], axis=1)
+        enabled = np.stack([sdr != 0, sdc != 0, (sdr != 0) & (sdc != 0)], axis=1)
+        enabled &= found[:, None]
+        cands = np.where(enabled, cands, pos[:, None])
+        ok = (enabled & (self.flat[episodes[:, None], cands] != 2) &
+              ~self.visited[episodes[:, None], cands])
+
+        first = np.argmax(ok, axis=1)
+        moved = ok.any(axis=1)
+        return np.where(moved, cands[np.arange(len(episodes)), first], -1)
+
+    def step(self, orders=None):
+        episodes = np.flatnonzero(self.running)
+        if len(episodes) == 0:
+            return 0
+        m = len(episodes)
+        if orders is None:
+            orders = np.argsort(self.rng.random((m, 4)), axis=1)
+        else:
+            orders = np.asarray(orders)[episodes]
+
+        neigh, inside, cells = self._neighbours(episodes)
+        human = inside & (cells == 3)
+        open_ = (inside & (cells != 2) & ~human &
+                 ~self.visited[episodes[:, None], neigh])
+        near_human = human.sum(axis=1)
+
+        targets = np.full(m, -1)
+        alternative = np.zeros(m, dtype=bool)
+        adjacent = np.flatnonzero(near_human > 0)
+        if len(adjacent):
+            alt = self._alternative_moves(episodes[adjacent])
+            alternative[adjacent] = alt >= 0
+            targets[adjacent] = alt
+
+        # no detour taken: every human neighbour was probed once in the
+        # adjacency scan and again before the first valid shuffled move
+        rest = np.flatnonzero(~alternative)
+        picked = np.take_along_axis(open_[rest], orders[rest], axis=1)
+        has_move = picked.any(axis=1)
+        first = np.where(has_move, np.argmax(picked, axis=1), 4)
+        before = np.arange(4) < first[:, None]
+        probes = np.take_along_axis(human[rest], orders[rest], axis=1) & before
+        outside = np.take_along_axis(~inside[rest], orders[rest], axis=1) & before
+
+        self.human_encounters[episodes[alternative]] += 1
+        self.alternative_paths_used[episodes[alternative]] += 1
+        self.human_encounters[episodes[rest]] += near_human[rest] + probes.sum(axis=1)
+        direction = np.take_along_axis(
+            orders[rest], np.minimum(first, 3)[:, None], axis=1)[:, 0]
+        targets[rest] = np.where(
+            has_move, neigh[rest, direction], -1)
+
+        moved = targets >= 0
+        who, where = episodes[moved], targets[moved]
+        self.positions[who] = where
+        self.visited[who, where] = True
+        self.steps_taken[who] += 1
+        collected = self.flat[who, where] == 1
+        self.flat[who[collected], where[collected]] = 0
+        self.waste_collected[who[collected]] += 1
+
+        self.ticks[episodes] += 1
+        stopped = ~moved
+        stopped[rest] |= outside.any(axis=1)
+        self.running[episodes[stopped]] = False
+        return m
+
+    def run(self, max_steps=1000, episodes=None):
+        self.reset()
+        if episodes is not None:
+            self.running[episodes:] = False
+        self.running &= self.ticks < max_steps
+        while self.running.any():
+            self.step()
+            self.running &= self.ticks < max_steps
+        return self.get_totals()
+
+    def get_totals(self):
+        return {
+            "human_encounters": int(self.human_encounters.sum()),
+            "alternative_paths_used": int(self.alternative_paths_used.sum()),
+            "waste_collected": int(self.waste_collected.sum()),
+        }
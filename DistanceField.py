@@ -0,0 +1,155 @@
+import numpy as np
+from Action import Action
+from NeighbourTable import NeighbourTable
+
+UNREACHED = np.iinfo(np.int32).max
+
+
+class DistanceField:
+    # Steps from every cell to its nearest remaining hazard, by multi-source
+    # BFS that advances a whole wavefront per NumPy operation. Inaccessible
+    # cells and humans are walls. Removing a hazard only re-grows the cells
+    # that depended on it (see remove_source), so keeping the field current
+    # costs about the size of the hazard's catchment area, not the grid.
+    def __init__(self, environment, table=None):
+        self.environment = environment
+        self.table = table or NeighbourTable(environment.grid, Action.actions)
+        cells = self.table.rows * self.table.cols
+        self.dist = np.full(cells, UNREACHED, dtype=np.int32)
+        self._stamp = np.zeros(cells, dtype=np.intp)
+        self.sources = 0
+        self.rebuild()
+
+    def _neighbours(self, cells):
+        # passable 4-neighbours of cells, with repeats
+        neigh = self.table.table[cells].ravel()
+        neigh = neigh[neigh >= 0]
+        return neigh[self.environment.grid.reshape(-1)[neigh] != 3]
+
+    def _distinct(self, cells):
+        # drops repeats without the sort np.unique would do: each cell keeps
+        # the occurrence whose position survives in the stamp array
+        order = np.arange(len(cells))
+        self._stamp[cells] = order
+        return cells[self._stamp[cells] == order]
+
+    def rebuild(self):
+        self.dist[:] = UNREACHED
+        frontier = np.flatnonzero(self.environment.grid.reshape(-1) == 1)
+        self.sources = len(frontier)
+        self.dist[frontier] = 0
+        level = 0
+        while len(frontier):
+            neigh = self._neighbours(frontier)
+            frontier = self._distinct(neigh[self.dist[neigh] == UNREACHED])
+            level += 1
+            self.dist[frontier] = level
+
+    def sync(self):
+        # rebuild if hazards were placed or removed behind the field's back
+        if self.environment.count_bio_hazards() != self.sources:
+            self.rebuild()
+
+    def remove_source(self, position):
+        source = self.table.index(position)
+        if self.dist[source] != 0:
+            return False
+        self.sources -= 1
+        self._regrow(self._ascending_region(np.array([source])))
+        return True
+
+    def update_humans(self, vacated, occupied):
+        # patches the field after humans moved off the flat cells vacated and
+        # onto the flat cells occupied; the grid must already show the move.
+        # Freed cells first pull distances down around them, then the cells
+        # that depended on the newly blocked ones are regrown.
+        dist = self.dist
+        vacated = np.asarray(vacated, dtype=np.intp)
+        occupied = np.asarray(occupied, dtype=np.intp)
+        if len(vacated):
+            self._relax(vacated)
+        occupied = occupied[dist[occupied] != UNREACHED]
+        if len(occupied):
+            self._regrow(self._ascending_region(occupied))
+
+    def _relax(self, cells):
+        # label-correcting BFS from newly passable cells: each round lowers
+        # the neighbours of the cells lowered in the round before
+        dist = self.dist
+        grid = self.environment.grid.reshape(-1)
+        neigh = self.table.table[cells]
+        passable = (neigh >= 0) & (grid[np.maximum(neigh, 0)] != 3)
+        best = np.where(passable, dist[np.maximum(neigh, 0)], UNREACHED).min(axis=1)
+        reached = best != UNREACHED
+        frontier, lowered = cells[reached], best[reached] + 1
+        improved = lowered < dist[frontier]
+        frontier = frontier[improved]
+        dist[frontier] = lowered[improved]
+        while len(frontier):
+            neigh = self.table.table[frontier]
+            step = np.repeat(dist[frontier] + 1, neigh.shape[1])
+            neigh = neigh.ravel()
+            keep = (neigh >= 0) & (grid[np.maximum(neigh, 0)] != 3)
+            neigh, step = neigh[keep], step[keep]
+            keep = step < dist[neigh]
+            neigh, step = neigh[keep], step[keep]
+            np.minimum.at(dist, neigh, step)
+            frontier = self._distinct(neigh)
+
+    def _ascending_region(self, cells):
+        # cells plus every cell on a strictly ascending chain out of them:
+        # the only cells whose shortest path may run through cells. Cells
+        # off those chains keep a shortest path that avoids them.
+        dist = self.dist
+        grid = self.environment.grid.reshape(-1)
+        region = [cells]
+        frontier = cells
+        while len(frontier):
+            neigh = self.table.table[frontier]
+            step = np.repeat(dist[frontier] + 1, neigh.shape[1])
+            neigh = neigh.ravel()
+            keep = neigh >= 0
+            neigh, step = neigh[keep], step[keep]
+            keep = (dist[neigh] == step) & (grid[neigh] != 3)
+            frontier = self._distinct(neigh[keep])
+            region.append(frontier)
+        return np.concatenate(region)
+
+    def _regrow(self, region):
+        # forgets the region's distances and regrows into it from its
+        # boundary, one level at a time; boundary cells join the wavefront
+        # when it reaches their distance
+        dist = self.dist
+        dist[region] = UNREACHED
+        boundary = self._neighbours(region)
+        boundary = self._distinct(boundary[dist[boundary] != UNREACHED])
+        boundary = boundary[np.argsort(dist[boundary], kind="stable")]
+        levels = dist[boundary]
+        frontier = boundary[:0]
+        taken = 0
+        level = 0
+        while len(frontier) or taken < len(boundary):
+            if not len(frontier):
+                level = levels[taken]
+            end = np.searchsorted(levels, level, side="right")
+            frontier = np.concatenate((frontier, boundary[taken:end]))
+            taken = end
+            neigh = self._neighbours(frontier)
+            frontier = self._distinct(neigh[dist[neigh] == UNREACHED])
+            level += 1
+            dist[frontier] = level
+
+    def distance(self, position):
+        d = int(self.dist[self.table.index(position)])
+        return None if d == UNREACHED else d
+
+    def next_step(self, index):
+        # first neighbour in action order that is one step closer to a hazard
+        d = self.dist[index]
+        if d == UNREACHED or d == 0:
+            return None
+        grid = self.environment.grid
+        for target in self.table.table[index].tolist():
+            if target >= 0 and self.dist[target] == d - 1 and grid.item(target) != 3:
+                return target
+        return None
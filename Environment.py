@@ -1,52 +1,151 @@
 import numpy as np
+from HazardIndex import HazardIndex
+from instrumentation import STATS
+from components import label_components
+
+# placements on grids at least this large, asking for at most one cell in
+# SPARSE_PLACEMENT_MAX_DENSITY of the clean ones, use rejection sampling
+SPARSE_PLACEMENT_MIN_CELLS = 1 << 18
+SPARSE_PLACEMENT_MAX_DENSITY = 8
+# full-grid cell counts are taken this many cells at a time, so counting a
+# memory-mapped floor plan never materialises a widened copy of it
+COUNT_CHUNK_CELLS = 1 << 22
+# cell codes are 0..3, so built-in grids use one byte per cell
+GRID_DTYPE = np.int8
+
+
+def count_cells(grid):
+    flat = grid.reshape(-1)
+    counts = np.zeros(4, dtype=np.int64)
+    for start in range(0, flat.size, COUNT_CHUNK_CELLS):
+        chunk = flat[start:start + COUNT_CHUNK_CELLS]
+        # one byte-wide compare per code; bincount would widen the chunk
+        for k in range(4):
+            counts[k] += np.count_nonzero(chunk == k)
+    return [int(n) for n in counts]
+
+
+def floor_plan_walls(rows, cols):
+    # the built-in floor plan as (row_start, row_stop, col_start, col_stop)
+    # wall rectangles: the outer border, plus fixed rooms on grids of at
+    # least 100 x 100
+    walls = [(0, 1, 0, cols), (rows - 1, rows, 0, cols), (0, rows, 0, 1), (0, rows, cols - 1, cols)]
+    if min(rows, cols) >= 100:
+        walls += [(1, 21, 79, 99), (39, 60, 79, 99), (79, 99, 79, 99), (1, 21, 1, 21),
+                  (69, 99, 1, 31), (69, 99, 40, 65), (40, 50, 0, 15), (35, 61, 35, 61)]
+    return walls
 
 
 class Environment:
-    def __init__(self, size):
+    # size is an int for a square grid or a (rows, cols) pair. obstacles is an
+    # optional grid of cell codes (see obstacle_maps) used in place of the
+    # built-in floor plan; it is adopted as self.grid without copying.
+    def __init__(self, size, debug=False, layout=None, obstacles=None):
+        if obstacles is not None:
+            size = obstacles.shape
         self.size = size
-        self.grid = np.zeros((size, size), dtype=int)
-        self._create_inaccessible_areas()
+        self.rows, self.cols = (size, size) if np.ndim(size) == 0 else (int(size[0]), int(size[1]))
+        self.debug = debug
+        self._hazard_index = None
+        self._counts = None
+        self._human_neighbours = None
+        self._free_cells = None
+        self._layout = None
+        self._components = None
+        self._component_hazards = None
+        if layout is not None:
+            self.grid = np.empty(layout.grid.shape, dtype=layout.grid.dtype)
+            self.reset_to_layout(layout)
+        elif obstacles is not None:
+            self.grid = obstacles
+        else:
+            self.grid = np.zeros((self.rows, self.cols), dtype=GRID_DTYPE)
+            self._create_inaccessible_areas()
+
+    def reset_to_layout(self, layout):
+        # one memcpy of the template grid; the layout's counts and free-cell
+        # index replace the full-grid scans placement would otherwise do
+        np.copyto(self.grid, layout.grid)
+        self._counts = list(layout.counts)
+        self._free_cells = layout.free_cells
+        self._hazard_index = None
+        if layout.counts[1] == 0:
+            self._hazard_index = HazardIndex(self.rows, self.cols)
+        self._human_neighbours = None
+        if layout.counts[3] == 0:
+            self._human_neighbours = np.zeros(self.grid.shape, dtype=np.int8)
+        # component labels are built on first use and shared by every
+        # environment stamped from the layout
+        self._layout = layout
+        self._components = None
+        self._component_hazards = None
+
+    def invalidate_caches(self):
+        # call after writing to self.grid directly; derived indexes are
+        # rebuilt from the grid on their next use
+        self._hazard_index = None
+        self._counts = None
+        self._human_neighbours = None
+        self._free_cells = None
+        self._layout = None
+        self._components = None
+        self._component_hazards = None
+
+    def _scan_counts(self):
+        return count_cells(self.grid)
+
+    def _class_counts(self):
+        if self._counts is None:
+            self._counts = self._scan_counts()
+        elif self.debug:
+            actual = self._scan_counts()
+            if actual != self._counts:
+                raise AssertionError(
+                    "cell counts out of sync: tracked %s, grid has %s" % (self._counts, actual))
+        return self._counts
+
+    def _fill(self, region, value):
+        if self._counts is not None:
+            before = np.bincount(self.grid[region].ravel(), minlength=4)
+            for k in range(4):
+                self._counts[k] -= int(before[k])
+            self._counts[value] += self.grid[region].size
+        self.grid[region] = value
+        self._free_cells = None
+        self._components = None
+        self._component_hazards = None
 
     def _create_inaccessible_areas(self):
-        size = self.size
-        self.grid[0, :] = 2
-        self.grid[size - 1, :] = 2
-        self.grid[:, 0] = 2
-        self.grid[:, size - 1] = 2
-
-        if size >= 100:
-            self.grid[1:21, 79:99] = 2
-            self.grid[39:60, 79:99] = 2
-            self.grid[79:99, 79:99] = 2
-            self.grid[1:21, 1:21] = 2
-            self.grid[69:99, 1:31] = 2
-            self.grid[69:99, 40:65] = 2
-            self.grid[40:50, 0:15] = 2
-            self.grid[35:61, 35:61] = 2
-
-    def place_bio_hazards(self, bio_hazard_count):
+        for r0, r1, c0, c1 in floor_plan_walls(self.rows, self.cols):
+            self._fill(np.s_[r0:r1, c0:c1], 2)
+
+    def place_bio_hazards(self, bio_hazard_count, rng=None):
         if bio_hazard_count <= 0:
             self.grid[self.grid == 1] = 0
+            if self._hazard_index is not None:
+                self._hazard_index.clear()
+            if self._counts is not None:
+                self._counts[0] += self._counts[1]
+                self._counts[1] = 0
+            if self._component_hazards is not None:
+                self._component_hazards[:] = 0
+            self._free_cells = None
             return 0
 
-        empty_positions = np.argwhere(self.grid == 0)
-
-        if len(empty_positions) == 0:
-            return 0
-
-        actual_count = min(int(bio_hazard_count), len(empty_positions))
+        rows, cols = self._select_empty_cells(bio_hazard_count, rng)
+        actual_count = len(rows)
 
         if actual_count <= 0:
             return 0
 
-        selected_indices = np.random.choice(
-            len(empty_positions),
-            actual_count,
-            replace=False
-        )
-
-        rows, cols = empty_positions[selected_indices].T
         self.grid[rows, cols] = 1
+        if self._hazard_index is not None:
+            self._hazard_index.add_many(np.column_stack((rows, cols)))
+        if self._counts is not None:
+            self._counts[0] -= actual_count
+            self._counts[1] += actual_count
+        if self._component_hazards is not None:
+            np.add.at(self._component_hazards, self._components[rows, cols], 1)
 
         return int(actual_count)
 
@@ -54,7 +153,7 @@ class Environment:
         if position is None or len(position) != 2:
             return False
         r, c = position
-        return bool(0 <= r < self.size and 0 <= c < self.size)
+        return bool(0 <= r < self.rows and 0 <= c < self.cols)
 
     def is_accessible(self, position):
         if not self.is_inside_grid(position):
@@ -81,55 +180,284 @@ class Environment:
         r, c = position
 
         if self.grid[r, c] == 1:
+            if STATS.enabled:
+                STATS.count("environment.clean_cell")
             self.grid[r, c] = 0
+            if self._hazard_index is not None:
+                self._hazard_index.remove((r, c))
+            if self._counts is not None:
+                self._counts[1] -= 1
+                self._counts[0] += 1
+            if self._component_hazards is not None:
+                self._component_hazards[self._components[r, c]] -= 1
+            self._free_cells = None
             return True
 
         return False
 
+    def clean_cells(self, rows, cols):
+        # bulk clean_cell for many positions at once; returns a bool mask of
+        # the positions that held a hazard. A cell listed more than once is
+        # credited to its first occurrence only.
+        rows, cols = np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)
+        cleaned = np.zeros(len(rows), dtype=bool)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        where = np.flatnonzero(inside)
+        flat = rows[where] * self.cols + cols[where]
+        _, first = np.unique(flat, return_index=True)
+        where = where[first]
+        hazard = self.grid[rows[where], cols[where]] == 1
+        where = where[hazard]
+        cleaned[where] = True
+        if len(where) == 0:
+            return cleaned
+        if STATS.enabled:
+            STATS.count("environment.clean_cell", len(where))
+        self.grid[rows[where], cols[where]] = 0
+        if self._hazard_index is not None:
+            self._hazard_index.remove_many(np.column_stack((rows[where], cols[where])))
+        if self._counts is not None:
+            self._counts[1] -= len(where)
+            self._counts[0] += len(where)
+        if self._component_hazards is not None:
+            np.subtract.at(self._component_hazards, self._components[rows[where], cols[where]], 1)
+        self._free_cells = None
+        return cleaned
+
     def count_bio_hazards(self):
-        return int(np.sum(self.grid == 1))
+        return self._class_counts()[1]
 
     def count_inaccessible_areas(self):
-        return int(np.sum(self.grid == 2))
+        return self._class_counts()[2]
 
     def count_clean_areas(self):
-        return int(np.sum(self.grid == 0))
+        return self._class_counts()[0]
 
     def count_accessible_areas(self):
-        return int(np.sum(self.grid != 2))
+        return self.grid.size - self._class_counts()[2]
 
     def get_grid(self):
-        return self.grid.copy()
+        # a private copy, widened to int as the grid used to be
+        return self.grid.astype(int)
+
+    def grid_view(self, region=np.s_[:, :]):
+        # read-only view of the grid, or of a basic-slice region of it,
+        # without copying; it shares memory with the grid, so it shows later
+        # placements, cleaning and moves
+        view = self.grid.view()
+        view.flags.writeable = False
+        return view[region]
 
     def get_bio_hazard_coordinates(self):
         return np.argwhere(self.grid == 1).tolist()
 
+    def _hazards(self):
+        if self._hazard_index is None:
+            index = HazardIndex(self.rows, self.cols)
+            index.add_many(np.argwhere(self.grid == 1))
+            self._hazard_index = index
+        return self._hazard_index
+
+    def nearest_bio_hazard(self, position):
+        if STATS.enabled:
+            return STATS.timed("environment.nearest_bio_hazard", self._hazards().nearest, position)
+        return self._hazards().nearest(position)
+
+    def _component_labels(self):
+        # components of the accessible cells; humans move, so they do not
+        # split components, and diagonal links count because a detour
+        # around a human can step diagonally
+        if self._components is None:
+            if self._layout is not None:
+                self._components = self._layout.component_labels()
+            else:
+                self._components, _ = label_components(self.grid != 2, diagonal=True)
+        return self._components
+
+    def _hazards_per_component(self):
+        if self._component_hazards is None:
+            labels = self._component_labels()
+            count = int(labels.max()) + 1 if labels.size else 0
+            self._component_hazards = np.bincount(
+                labels[self.grid == 1], minlength=count).astype(np.int64)
+        return self._component_hazards
+
+    def component_of(self, position):
+        if not self.is_inside_grid(position):
+            return -1
+        return int(self._component_labels()[position[0], position[1]])
+
+    def count_reachable_bio_hazards(self, position):
+        # live hazards in the connected component of position
+        label = self.component_of(position)
+        if label < 0:
+            return 0
+        return int(self._hazards_per_component()[label])
+
     def get_inaccessible_coordinates(self):
         return np.argwhere(self.grid == 2).tolist()
 
     def get_clean_area_coordinates(self):
+        if self._free_cells is not None:
+            rows, cols = np.divmod(self._free_cells, self.cols)
+            return np.column_stack((rows, cols)).tolist()
         return np.argwhere(self.grid == 0).tolist()
 
-    def place_humans(self, human_count):
+    def nth_clean_cell(self, index):
+        # index-th clean cell in the row-major order of get_clean_area_coordinates
+        r, c = divmod(int(self._empty_cells()[index]), self.cols)
+        return (r, c)
+
+    def _empty_cells(self):
+        # flat indices of clean cells in row-major order, as argwhere lists them
+        if self._free_cells is None:
+            self._free_cells = np.flatnonzero(self.grid == 0)
+        return self._free_cells
+
+    def _select_empty_cells(self, count, rng=None):
+        # uniform sample of distinct clean cells; rng is an optional
+        # np.random.Generator, otherwise the global np.random state is used
+        clean = self.count_clean_areas()
+        count = min(int(count), clean)
+        if count <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        if (self.grid.size >= SPARSE_PLACEMENT_MIN_CELLS
+                and count * SPARSE_PLACEMENT_MAX_DENSITY <= clean):
+            self._free_cells = None
+            return np.divmod(self._sample_sparse(count, clean, rng), self.cols)
+
+        empty_cells = self._empty_cells()
+        count = min(count, len(empty_cells))
+        if rng is None:
+            selected_indices = np.random.choice(len(empty_cells), count, replace=False)
+        else:
+            selected_indices = rng.choice(len(empty_cells), count, replace=False)
+        if self._free_cells is not None:
+            self._free_cells = np.delete(self._free_cells, selected_indices)
+        return np.divmod(empty_cells[selected_indices], self.cols)
+
+    def _sample_sparse(self, count, clean, rng=None):
+        # rejection sampling on flat indices: uniform draws over the whole
+        # grid, keeping clean cells in first-drawn order until count are
+        # distinct. Memory is O(count) rather than O(grid) for argwhere.
+        flat = self.grid.reshape(-1)
+        chosen = np.empty(0, dtype=np.intp)
+        while len(chosen) < count:
+            draws = int((count - len(chosen)) * flat.size / clean * 1.1) + 16
+            if rng is None:
+                cand = np.random.randint(0, flat.size, draws)
+            else:
+                cand = rng.integers(0, flat.size, draws)
+            cand = np.concatenate((chosen, cand[flat[cand] == 0]))
+            _, first = np.unique(cand, return_index=True)
+            chosen = cand[np.sort(first)][:count]
+        return chosen
+
+    def place_humans(self, human_count, rng=None):
         if human_count <= 0:
             self.grid[self.grid == 3] = 0
+            if self._counts is not None:
+                self._counts[0] += self._counts[3]
+                self._counts[3] = 0
+            if self._human_neighbours is not None:
+                self._human_neighbours[:] = 0
+            self._free_cells = None
             return 0
 
-        empty_positions = np.argwhere(self.grid == 0)
-        if len(empty_positions) == 0:
-            return 0
-
-        actual_count = min(int(human_count), len(empty_positions))
+        rows, cols = self._select_empty_cells(human_count, rng)
+        actual_count = len(rows)
         if actual_count <= 0:
             return 0
 
-        selected_indices = np.random.choice(
-            len(empty_positions), actual_count, replace=False)
-        rows, cols = empty_positions[selected_indices].T
         self.grid[rows, cols] = 3
+        if self._counts is not None:
+            self._counts[0] -= actual_count
+            self._counts[3] += actual_count
+        if self._human_neighbours is not None:
+            self._adjust_human_neighbours(rows, cols, 1)
         return int(actual_count)
 
+    def move_human(self, source, target):
+        if not (self.is_human(source) and self.is_clean(target)):
+            return False
+        self.grid[source[0], source[1]] = 0
+        self.grid[target[0], target[1]] = 3
+        self._free_cells = None
+        if self._human_neighbours is not None:
+            self._adjust_human_neighbours([source[0]], [source[1]], -1)
+            self._adjust_human_neighbours([target[0]], [target[1]], 1)
+        return True
+
+    def move_humans(self, sources, targets):
+        # bulk move_human: sources and targets are (n, 2) position arrays.
+        # A move goes ahead when its source holds a human and its target is
+        # a clean cell, and no earlier move in the batch claimed either cell;
+        # returns a bool mask of the moves made. Human-neighbour counts are
+        # adjusted, not rebuilt.
+        sources = np.asarray(sources, dtype=np.intp).reshape(-1, 2)
+        targets = np.asarray(targets, dtype=np.intp).reshape(-1, 2)
+        moved = np.zeros(len(sources), dtype=bool)
+        inside = np.ones(len(sources), dtype=bool)
+        for cells in (sources, targets):
+            inside &= ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                       (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+        where = np.flatnonzero(inside)
+        where = where[(self.grid[sources[where, 0], sources[where, 1]] == 3) &
+                      (self.grid[targets[where, 0], targets[where, 1]] == 0)]
+        for cells in (targets, sources):
+            _, first = np.unique(cells[where, 0] * self.cols + cells[where, 1],
+                                 return_index=True)
+            where = where[np.sort(first)]
+        moved[where] = True
+        if len(where) == 0:
+            return moved
+        sr, sc = sources[where, 0], sources[where, 1]
+        tr, tc = targets[where, 0], targets[where, 1]
+        self.grid[sr, sc] = 0
+        self.grid[tr, tc] = 3
+        self._free_cells = None
+        if self._human_neighbours is not None:
+            self._adjust_human_neighbours(sr, sc, -1)
+            self._adjust_human_neighbours(tr, tc, 1)
+        return moved
+
+    def _adjust_human_neighbours(self, rows, cols, delta):
+        # cells must be distinct, so each shifted copy is too and a plain
+        # fancy-index add is safe (np.add.at is several times slower)
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        counts = self._human_neighbours
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            nr, nc = rows + dr, cols + dc
+            inside = (nr >= 0) & (nr < counts.shape[0]) & (nc >= 0) & (nc < counts.shape[1])
+            counts[nr[inside], nc[inside]] += delta
+
+    def _human_adjacency(self):
+        # number of human 4-neighbours of every cell, a dilation of grid == 3
+        if self._human_neighbours is None:
+            humans = (self.grid == 3).astype(np.int8)
+            counts = np.zeros(self.grid.shape, dtype=np.int8)
+            counts[1:, :] += humans[:-1, :]
+            counts[:-1, :] += humans[1:, :]
+            counts[:, 1:] += humans[:, :-1]
+            counts[:, :-1] += humans[:, 1:]
+            self._human_neighbours = counts
+        return self._human_neighbours
+
+    def human_adjacency_mask(self):
+        return self._human_adjacency() > 0
+
+    def is_near_human(self, position):
+        if STATS.enabled:
+            STATS.count("environment.is_near_human")
+        if not self.is_inside_grid(position):
+            return False
+        r, c = position
+        return bool(self._human_adjacency()[r, c])
+
     def is_human(self, position):
+        if STATS.enabled:
+            STATS.count("environment.is_human")
         if not self.is_inside_grid(position):
             return False
         r, c = position
@@ -0,0 +1,207 @@
+import json
+import os
+import numpy as np
+
+# Directory layout:
+#   meta.json      format version, coordinate dtype, stop-reason table
+#   episodes.npy   one INDEX_DTYPE record per episode (seed, config, stats,
+#                  offsets into the coordinate files)
+#   paths.bin      (row, col) pairs of every path, back to back
+#   collected.bin  (row, col) pairs of every collected hazard
+# The .bin files are raw fixed-size records, so one episode can be mapped
+# with np.memmap(offset=...) without reading anything else.
+
+FORMAT_VERSION = 2
+
+INDEX_DTYPE = np.dtype([
+    ("seed", "<i8"),
+    ("rows", "<i4"),
+    ("cols", "<i4"),
+    ("bio_hazards", "<i4"),
+    ("humans", "<i4"),
+    ("max_steps", "<i4"),
+    ("steps_taken", "<i4"),
+    ("waste_collected", "<i4"),
+    ("human_encounters", "<i4"),
+    ("alternative_paths_used", "<i4"),
+    ("stop_reason", "<i2"),
+    ("start_row", "<i4"),
+    ("start_col", "<i4"),
+    ("path_offset", "<i8"),
+    ("path_length", "<i8"),
+    ("collected_offset", "<i8"),
+    ("collected_length", "<i8"),
+])
+
+REPORT_HEADER = """===== BIO-HAZARD CLEANING AGENT SIMULATION REPORT =====
+
+1. Data Structures Used:
+- 2D numpy arrays for environment grid
+- Lists for storing clean, inaccessible, and bio-hazard coordinates
+- List for storing agent path
+- List for storing collected bio-hazard coordinates
+
+2. Algorithm Description:
+- Initialize environment ({rows}x{cols} grid) with inaccessible areas and random bio-hazards
+- Initialize agent at a random clean cell
+- While agent is active:
+    - Randomly select movement direction
+    - Check if next cell is accessible and not visited
+    - Move agent to new cell
+    - If the cell has bio-hazard, collect and mark as cleaned
+    - Stop if no valid moves or next cell is inaccessible
+"""
+
+
+class ArchiveWriter:
+    # coord_dtype is fixed for the whole archive. Without one it is int16
+    # when max_size (the largest grid size, an int or (rows, cols), that
+    # will be added) fits, and int32 otherwise, so mixed sizes always fit.
+    def __init__(self, directory, coord_dtype=None, max_size=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        if coord_dtype is None:
+            small = max_size is not None and np.max(max_size) <= np.iinfo(np.int16).max
+            coord_dtype = np.int16 if small else np.int32
+        self.coord_dtype = np.dtype(coord_dtype)
+        self.stop_reasons = [None]
+        self.records = []
+        self.path_length = 0
+        self.collected_length = 0
+        self.paths = open(os.path.join(directory, "paths.bin"), "wb")
+        self.collected = open(os.path.join(directory, "collected.bin"), "wb")
+
+    def _coords(self, positions):
+        coords = np.asarray(list(positions), dtype=np.int64).reshape(-1, 2)
+        limits = np.iinfo(self.coord_dtype)
+        if len(coords) and (coords.min() < limits.min or coords.max() > limits.max):
+            raise ValueError("coordinates do not fit in %s" % self.coord_dtype)
+        return coords.astype(self.coord_dtype)
+
+    def _reason_code(self, reason):
+        if reason not in self.stop_reasons:
+            self.stop_reasons.append(reason)
+        return self.stop_reasons.index(reason)
+
+    def add(self, agent, seed=-1, size=0, bio_hazards=0, humans=0, max_steps=0):
+        # size is an int for a square grid or a (rows, cols) pair
+        rows, cols = (size, size) if np.ndim(size) == 0 else size
+        path = self._coords(agent.get_path())
+        collected = self._coords(agent.collected_positions or [])
+        self.paths.write(path.tobytes())
+        self.collected.write(collected.tobytes())
+        stats = agent.get_statistics()
+        start = path[0] if len(path) else (-1, -1)
+        self.records.append((
+            seed, rows, cols, bio_hazards, humans, max_steps,
+            stats["steps_taken"], stats["waste_collected"],
+            getattr(agent, "human_encounters", 0),
+            getattr(agent, "alternative_paths_used", 0),
+            self._reason_code(stats["stop_reason"]),
+            start[0], start[1],
+            self.path_length, len(path), self.collected_length, len(collected),
+        ))
+        self.path_length += len(path)
+        self.collected_length += len(collected)
+        return len(self.records) - 1
+
+    def close(self):
+        if self.paths.closed:
+            return
+        self.paths.close()
+        self.collected.close()
+        np.save(os.path.join(self.directory, "episodes.npy"),
+                np.array(self.records, dtype=INDEX_DTYPE))
+        with open(os.path.join(self.directory, "meta.json"), "w") as fh:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "coord_dtype": self.coord_dtype.str,
+                "stop_reasons": self.stop_reasons,
+            }, fh)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class EpisodeArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as fh:
+            meta = json.load(fh)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError("unsupported archive version %s" % meta["version"])
+        self.coord_dtype = np.dtype(meta["coord_dtype"])
+        self.stop_reasons = meta["stop_reasons"]
+        self.index = np.load(os.path.join(directory, "episodes.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.index)
+
+    def _map(self, name, offset, length):
+        if length == 0:
+            return np.zeros((0, 2), dtype=self.coord_dtype)
+        return np.memmap(os.path.join(self.directory, name), dtype=self.coord_dtype,
+                         mode="r", offset=int(offset) * 2 * self.coord_dtype.itemsize,
+                         shape=(int(length), 2))
+
+    def path(self, i):
+        record = self.index[i]
+        return self._map("paths.bin", record["path_offset"], record["path_length"])
+
+    def collected(self, i):
+        record = self.index[i]
+        return self._map("collected.bin", record["collected_offset"], record["collected_length"])
+
+    def episode(self, i):
+        record = self.index[i]
+        rows, cols = int(record["rows"]), int(record["cols"])
+        config = {name: int(record[name]) for name in ("bio_hazards", "humans", "max_steps")}
+        config["size"] = rows if rows == cols else (rows, cols)
+        return {
+            "seed": int(record["seed"]),
+            "config": config,
+            "statistics": {
+                "steps_taken": int(record["steps_taken"]),
+                "waste_collected": int(record["waste_collected"]),
+                "stop_reason": self.stop_reasons[record["stop_reason"]],
+            },
+            "human_encounters": int(record["human_encounters"]),
+            "alternative_paths_used": int(record["alternative_paths_used"]),
+            "path": self.path(i),
+            "collected": self.collected(i),
+        }
+
+    def text_report(self, i):
+        # the simulation_report.txt layout, rebuilt from the stored episode
+        episode = self.episode(i)
+        config, stats = episode["config"], episode["statistics"]
+        path, collected = episode["path"], episode["collected"]
+        waste = stats["waste_collected"]
+        rows, cols = int(self.index[i]["rows"]), int(self.index[i]["cols"])
+        lines = [REPORT_HEADER.format(rows=rows, cols=cols),
+                 "3. Test Data:",
+                 "- Environment size: %dx%d" % (rows, cols),
+                 "- Bio-hazard cells placed: %d" % config["bio_hazards"]]
+        if len(path):
+            lines.append("- Random starting position of agent: (%d, %d)" % tuple(path[0]))
+        lines += ["",
+                  "4. Console Output:",
+                  "Stop reason: %s" % stats["stop_reason"],
+                  "Total steps taken: %d" % stats["steps_taken"],
+                  "Total waste collected: %d" % waste,
+                  "Percentage of bio-hazard cleaned: %.2f%%" % (
+                      100.0 * waste / config["bio_hazards"] if config["bio_hazards"] else 0.0),
+                  "Average steps per waste collected: %.2f" % (
+                      stats["steps_taken"] / waste if waste else 0.0),
+                  "Total path length: %d" % len(path),
+                  "",
+                  "Agent Path (first to last):"]
+        lines += ["%d: (%d, %d)" % (n, r, c) for n, (r, c) in enumerate(path.tolist(), 1)]
+        lines += ["", "Collected Bio-Hazard Coordinates:"]
+        lines += ["%d: (%d, %d)" % (n, r, c) for n, (r, c) in enumerate(collected.tolist(), 1)]
+        lines += ["", "===== END OF REPORT =====", ""]
+        return "\n".join(lines)
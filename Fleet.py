@@ -0,0 +1,116 @@
+import itertools
+import numpy as np
+from Action import Action
+from NeighbourTable import NeighbourTable
+
+# set bits per byte value, for counting packed visited bitmaps
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class Fleet:
+    # Many agents cleaning one shared Environment, stepped together with
+    # array operations. Every tick each active agent tries its four moves in
+    # a random order and takes the first one that is inside the grid,
+    # accessible, unvisited by that agent, not a human and not occupied by
+    # another agent. Agents whose only open moves are occupied wait a tick;
+    # agents with no open move at all stop. Two agents picking the same cell
+    # are resolved by a random priority drawn each tick: one moves, the other
+    # waits, so every hazard cell is claimed and cleaned by a single agent.
+    # Humans are treated as obstacles; the single-agent detour logic of
+    # human_avoidance is not applied to fleets.
+    # Each agent's visited cells are a packed bitmap row, cell i at bit
+    # i & 7 of byte i >> 3, so hundreds of agents on a large floor cost one
+    # bit per cell each.
+    def __init__(self, environment, starts, seed=None):
+        self.environment = environment
+        self.rng = np.random.default_rng(seed)
+        self.table = NeighbourTable(environment.grid, Action.actions)
+        self.permutations = np.array(list(itertools.permutations(range(self.table.width))))
+        cells = self.table.rows * self.table.cols
+
+        self.positions = np.array([self.table.index(p) for p in starts], dtype=np.int64)
+        self.count = len(self.positions)
+        flat = environment.grid.reshape(-1)
+        if len(np.unique(self.positions)) != self.count:
+            raise ValueError("fleet agents must start on distinct cells")
+        if np.any(flat[self.positions] != 0):
+            raise ValueError("fleet agents must start on clean cells")
+
+        agents = np.arange(self.count)
+        self.visited = np.zeros((self.count, (cells + 7) >> 3), dtype=np.uint8)
+        self._mark_visited(agents, self.positions)
+        self.occupied = np.zeros(cells, dtype=bool)
+        self.occupied[self.positions] = True
+        self.active = np.ones(self.count, dtype=bool)
+        self.steps_taken = np.zeros(self.count, dtype=np.int64)
+        self.waste_collected = np.zeros(self.count, dtype=np.int64)
+        self.waits = np.zeros(self.count, dtype=np.int64)
+        self.ticks = 0
+
+    def step(self):
+        agents = np.flatnonzero(self.active)
+        m = len(agents)
+        if m == 0:
+            return 0
+        orders = self.permutations[self.rng.integers(0, len(self.permutations), m)]
+        neigh = np.take_along_axis(self.table.table[self.positions[agents]], orders, axis=1)
+        inside = neigh >= 0
+        safe = np.where(inside, neigh, 0)
+        cells = self.environment.grid.reshape(-1)[safe]
+        seen = (self.visited[agents[:, None], safe >> 3] >> (safe & 7)) & 1
+        open_ = inside & (cells != 3) & (seen == 0)
+        free = open_ & ~self.occupied[safe]
+
+        has_open = open_.any(axis=1)
+        has_free = free.any(axis=1)
+        self.active[agents[~has_open]] = False
+        self.waits[agents[has_open & ~has_free]] += 1
+
+        movers = agents[has_free]
+        targets = neigh[has_free, np.argmax(free[has_free], axis=1)]
+        priority = self.rng.permutation(len(movers))
+        movers, targets = movers[priority], targets[priority]
+        _, first = np.unique(targets, return_index=True)
+        lost = np.ones(len(movers), dtype=bool)
+        lost[first] = False
+        self.waits[movers[lost]] += 1
+        movers, targets = movers[first], targets[first]
+
+        self.occupied[self.positions[movers]] = False
+        self.occupied[targets] = True
+        self.positions[movers] = targets
+        self._mark_visited(movers, targets)
+        self.steps_taken[movers] += 1
+        rows, cols = np.divmod(targets, self.table.cols)
+        cleaned = self.environment.clean_cells(rows, cols)
+        self.waste_collected[movers[cleaned]] += 1
+        self.ticks += 1
+        return len(movers)
+
+    def _mark_visited(self, agents, cells):
+        # agents are distinct, so a fancy-index |= is safe
+        self.visited[agents, cells >> 3] |= (1 << (cells & 7)).astype(np.uint8)
+
+    def has_visited(self, agent, position):
+        cell = self.table.index(position)
+        return bool((self.visited[agent, cell >> 3] >> (cell & 7)) & 1)
+
+    def visited_counts(self):
+        return POPCOUNT[self.visited].sum(axis=1)
+
+    def run(self, max_steps=1000):
+        while self.ticks < max_steps and self.active.any():
+            self.step()
+        return self.get_totals()
+
+    def get_positions(self):
+        rows, cols = np.divmod(self.positions, self.table.cols)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def get_totals(self):
+        return {
+            "steps_taken": int(self.steps_taken.sum()),
+            "waste_collected": int(self.waste_collected.sum()),
+            "waits": int(self.waits.sum()),
+            "active": int(self.active.sum()),
+        }
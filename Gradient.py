@@ -0,0 +1,51 @@
+from DistanceField import DistanceField, UNREACHED
+from instrumentation import STATS
+
+
+class Gradient:
+    # Walks down a DistanceField to the nearest remaining hazard. Revisiting
+    # cells is allowed, since the shortest way to the next hazard often
+    # crosses the path already taken; humans are walls in the field.
+    def __init__(self, agent, action_module, movement_validator, field=None):
+        self.agent = agent
+        self.action_module = action_module
+        self.movement_validator = movement_validator
+        self.environment = movement_validator.environment
+        self.field = field or DistanceField(self.environment)
+
+    def perform_move(self):
+        if STATS.enabled:
+            STATS.count("gradient.steps")
+            return STATS.timed("gradient.perform_move", self._step)
+        return self._step()
+
+    def _collect(self, position):
+        self.environment.clean_cell(position)
+        self.agent.collect_waste()
+        self.field.remove_source(position)
+
+    def _step(self):
+        field = self.field
+        field.sync()
+        position = self.agent.get_current_position()
+        here = field.table.index(position)
+        if self.environment.grid.item(here) == 1:
+            self._collect(position)
+        if field.dist[here] == UNREACHED:
+            self.agent.stop("No reachable bio-hazards")
+            return False
+
+        target = field.next_step(here)
+        if target is None:
+            # a human stepped onto the shortest path since the field was built
+            field.rebuild()
+            target = field.next_step(here)
+            if target is None:
+                self.agent.stop("No valid moves")
+                return False
+
+        new = field.table.position(target)
+        self.agent.update_position(new)
+        if self.environment.grid.item(target) == 1:
+            self._collect(new)
+        return True
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+class HazardIndex:
+    # Bucketed grid of live hazards for Manhattan nearest-neighbour queries.
+    # Buckets are searched in rings of growing Chebyshev radius; ring k+1 is
+    # at least k * bucket_size + 1 cells away, which bounds the search.
+    def __init__(self, rows, cols, bucket_size=16):
+        self.rows = rows
+        self.cols = cols
+        self.bucket_size = bucket_size
+        self.bucket_rows = (rows + bucket_size - 1) // bucket_size
+        self.bucket_cols = (cols + bucket_size - 1) // bucket_size
+        self.buckets = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, position):
+        r, c = int(position[0]), int(position[1])
+        cell = self.buckets.get((r // self.bucket_size, c // self.bucket_size))
+        return cell is not None and (r, c) in cell
+
+    def add(self, position):
+        r, c = int(position[0]), int(position[1])
+        key = (r // self.bucket_size, c // self.bucket_size)
+        bucket = self.buckets.setdefault(key, set())
+        if (r, c) not in bucket:
+            bucket.add((r, c))
+            self.count += 1
+
+    def _grouped(self, positions):
+        # (bucket key, positions in it) pairs, grouped with numpy so bulk
+        # updates avoid a Python call per hazard
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        if len(positions) == 0:
+            return
+        keys = ((positions[:, 0] // self.bucket_size) * self.bucket_cols +
+                positions[:, 1] // self.bucket_size)
+        order = np.argsort(keys, kind="stable")
+        keys, positions = keys[order], positions[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for key, chunk in zip(keys[starts].tolist(), np.split(positions, starts[1:])):
+            yield divmod(key, self.bucket_cols), map(tuple, chunk.tolist())
+
+    def add_many(self, positions):
+        for key, chunk in self._grouped(positions):
+            bucket = self.buckets.setdefault(key, set())
+            before = len(bucket)
+            bucket.update(chunk)
+            self.count += len(bucket) - before
+
+    def remove_many(self, positions):
+        # returns how many of positions were in the index
+        removed = 0
+        for key, chunk in self._grouped(positions):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            before = len(bucket)
+            bucket.difference_update(chunk)
+            removed += before - len(bucket)
+            if not bucket:
+                del self.buckets[key]
+        self.count -= removed
+        return removed
+
+    def remove(self, position):
+        r, c = int(position[0]), int(position[1])
+        key = (r // self.bucket_size, c // self.bucket_size)
+        bucket = self.buckets.get(key)
+        if bucket is None or (r, c) not in bucket:
+            return False
+        bucket.discard((r, c))
+        if not bucket:
+            del self.buckets[key]
+        self.count -= 1
+        return True
+
+    def clear(self):
+        self.buckets.clear()
+        self.count = 0
+
+    def _ring(self, br, bc, k):
+        if k == 0:
+            yield br, bc
+            return
+        c0, c1 = max(bc - k, 0), min(bc + k, self.bucket_cols - 1)
+        for r in (br - k, br + k):
+            if 0 <= r < self.bucket_rows:
+                for c in range(c0, c1 + 1):
+                    yield r, c
+        r0, r1 = max(br - k + 1, 0), min(br + k - 1, self.bucket_rows - 1)
+        for c in (bc - k, bc + k):
+            if 0 <= c < self.bucket_cols:
+                for r in range(r0, r1 + 1):
+                    yield r, c
+
+    def _scan_all(self, ar, ac):
+        best = None
+        for bucket in self.buckets.values():
+            for r, c in bucket:
+                key = (abs(r - ar) + abs(c - ac), r, c)
+                if best is None or key < best:
+                    best = key
+        return best
+
+    def nearest(self, position):
+        # ties go to the smallest (row, col), matching min() over the
+        # row-major coordinate list from get_bio_hazard_coordinates
+        if self.count == 0:
+            return None
+        ar, ac = int(position[0]), int(position[1])
+        br, bc = ar // self.bucket_size, ac // self.bucket_size
+        max_k = max(br, bc, self.bucket_rows - 1 - br, self.bucket_cols - 1 - bc)
+        best = None
+        scanned = 0
+        for k in range(max_k + 1):
+            for key in self._ring(br, bc, k):
+                scanned += 1
+                bucket = self.buckets.get(key)
+                if not bucket:
+                    continue
+                for r, c in bucket:
+                    cand = (abs(r - ar) + abs(c - ac), r, c)
+                    if best is None or cand < best:
+                        best = cand
+            if best is not None and best[0] <= k * self.bucket_size:
+                break
+            if scanned > len(self.buckets) + self.count:
+                # sparse hazards: walking empty rings costs more than a scan
+                best = self._scan_all(ar, ac)
+                break
+        return [best[1], best[2]]
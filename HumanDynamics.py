@@ -0,0 +1,124 @@
+import numpy as np
+from Action import Action
+from NeighbourTable import NeighbourTable
+
+MODES = ("random_walk", "waypoint")
+
+
+class HumanDynamics:
+    # Moves every human on an Environment once per tick with array updates.
+    # random_walk: each human picks one of its four moves or stays put.
+    # waypoint: each human heads for its own random accessible cell, taking
+    # the step that closes the larger of the row and column gaps (the other
+    # axis when that one is blocked), and draws a new waypoint on arrival or
+    # after stalling for `patience` ticks.
+    # Moves into walls, hazards, other humans or the `avoid` cells are
+    # dropped; when several humans pick the same cell a random one gets it.
+    # The grid and the environment's human-neighbour counts are updated
+    # through Environment.move_humans, so the cost per tick depends on the
+    # number of humans, not the grid size. Humans must only be placed or
+    # removed through this object once it exists. rng is an optional
+    # np.random.Generator, otherwise the global np.random state is used.
+    # After each step, vacated and occupied hold the flat cells humans left
+    # and entered, for structures such as a DistanceField to patch.
+    def __init__(self, environment, mode="random_walk", rng=None, patience=8):
+        if mode not in MODES:
+            raise ValueError("unknown human motion %r, expected one of %s" % (mode, MODES))
+        self.environment = environment
+        self.mode = mode
+        self.rng = rng
+        self.patience = patience
+        self.table = NeighbourTable(environment.grid, Action.actions)
+        self.positions = np.flatnonzero(environment.grid.reshape(-1) == 3)
+        self.accessible = environment.grid.reshape(-1) != 2
+        self.ticks = 0
+        self.vacated = np.empty(0, dtype=np.int64)
+        self.occupied = np.empty(0, dtype=np.int64)
+        if mode == "waypoint":
+            self.waypoints = self._draw_waypoints(len(self.positions))
+            self.stalled = np.zeros(len(self.positions), dtype=np.int64)
+
+    def _integers(self, high, size):
+        if self.rng is None:
+            return np.random.randint(0, high, size)
+        return self.rng.integers(0, high, size)
+
+    def _permutation(self, n):
+        if self.rng is None:
+            return np.random.permutation(n)
+        return self.rng.permutation(n)
+
+    def _draw_waypoints(self, n):
+        # uniform over accessible cells by rejection, redrawing only misses
+        waypoints = self._integers(self.accessible.size, n)
+        missed = np.flatnonzero(~self.accessible[waypoints])
+        while len(missed):
+            waypoints[missed] = self._integers(self.accessible.size, len(missed))
+            missed = missed[~self.accessible[waypoints[missed]]]
+        return waypoints
+
+    def _random_walk_targets(self):
+        # choice 4 means staying put, which OUTSIDE also encodes
+        choice = self._integers(5, len(self.positions))
+        padded = np.column_stack((self.table.table[self.positions],
+                                  np.full(len(self.positions), -2)))
+        return padded[np.arange(len(self.positions)), choice]
+
+    def _waypoint_targets(self):
+        cols = self.table.cols
+        row, col = np.divmod(self.positions, cols)
+        goal_row, goal_col = np.divmod(self.waypoints, cols)
+        dr, dc = goal_row - row, goal_col - col
+        neighbours = self.table.table[self.positions]
+        # action columns follow Action.actions: UP, DOWN, LEFT, RIGHT
+        vertical = np.where(dr < 0, neighbours[:, 0], neighbours[:, 1])
+        horizontal = np.where(dc < 0, neighbours[:, 2], neighbours[:, 3])
+        vertical = np.where(dr == 0, -2, vertical)
+        horizontal = np.where(dc == 0, -2, horizontal)
+        rows_first = np.abs(dr) >= np.abs(dc)
+        first = np.where(rows_first, vertical, horizontal)
+        second = np.where(rows_first, horizontal, vertical)
+        grid = self.environment.grid.reshape(-1)
+        usable = (first >= 0) & (grid[np.maximum(first, 0)] == 0)
+        return np.where(usable, first, second)
+
+    def step(self, avoid=None):
+        # one tick for every human; avoid is a list of (row, col) cells, such
+        # as agent positions, that humans may not enter. Returns moves made.
+        n = len(self.positions)
+        self.ticks += 1
+        self.vacated = self.occupied = self.positions[:0]
+        if n == 0:
+            return 0
+        if self.mode == "waypoint":
+            targets = self._waypoint_targets()
+        else:
+            targets = self._random_walk_targets()
+
+        wants = targets >= 0
+        if avoid is not None and len(avoid):
+            avoid = np.asarray(avoid, dtype=np.int64).reshape(-1, 2)
+            wants &= ~np.isin(targets, avoid[:, 0] * self.table.cols + avoid[:, 1])
+        movers = np.flatnonzero(wants)
+        movers = movers[self._permutation(len(movers))]
+        cols = self.table.cols
+        sources = np.column_stack(np.divmod(self.positions[movers], cols))
+        destinations = np.column_stack(np.divmod(targets[movers], cols))
+        moved = movers[self.environment.move_humans(sources, destinations)]
+        self.vacated = self.positions[moved]
+        self.occupied = targets[moved]
+        self.positions[moved] = targets[moved]
+
+        if self.mode == "waypoint":
+            self.stalled += 1
+            self.stalled[moved] = 0
+            redraw = np.flatnonzero((self.positions == self.waypoints) |
+                                    (self.stalled >= self.patience))
+            if len(redraw):
+                self.waypoints[redraw] = self._draw_waypoints(len(redraw))
+                self.stalled[redraw] = 0
+        return len(moved)
+
+    def get_positions(self):
+        rows, cols = np.divmod(self.positions, self.table.cols)
+        return list(zip(rows.tolist(), cols.tolist()))
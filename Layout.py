@@ -0,0 +1,50 @@
+import numpy as np
+from Environment import Environment, count_cells
+from components import label_components
+from Action import Action
+from NeighbourTable import NeighbourTable
+
+
+class Layout:
+    # Static obstacle grid built once and shared by every episode on it.
+    # Environments are stamped out with one copy of the template grid, or
+    # recycled through acquire/release.
+    def __init__(self, size, obstacles=None):
+        template = Environment(size, obstacles=obstacles)
+        self.size = template.size
+        # a read-only view, so an obstacles array the template adopted
+        # stays writable for its owner
+        self.grid = template.grid.view()
+        self.grid.flags.writeable = False
+        self.free_cells = np.flatnonzero(self.grid == 0)
+        self.free_cells.flags.writeable = False
+        self.counts = count_cells(self.grid)
+        self._pool = []
+        self._components = None
+        self._neighbour_table = None
+
+    def component_labels(self):
+        if self._components is None:
+            labels, _ = label_components(self.grid != 2, diagonal=True)
+            labels.flags.writeable = False
+            self._components = labels
+        return self._components
+
+    def neighbour_table(self):
+        # walls are the only static cells, so one table serves every episode
+        if self._neighbour_table is None:
+            self._neighbour_table = NeighbourTable(self.grid, Action.actions)
+        return self._neighbour_table
+
+    def create_environment(self, debug=False):
+        return Environment(self.size, debug=debug, layout=self)
+
+    def acquire(self):
+        if self._pool:
+            env = self._pool.pop()
+            env.reset_to_layout(self)
+            return env
+        return self.create_environment()
+
+    def release(self, env):
+        self._pool.append(env)
@@ -1,40 +1,249 @@
-from Environment import Environment
 from Agent import Agent
 from Action import Action
 from Movement import Movement
 from Random import Random
+from Gradient import Gradient
+from HumanDynamics import HumanDynamics
+from BatchSimulation import BatchSimulation
+from Layout import Layout
+from RunningStats import RunningStats
+from EpisodeArchive import ArchiveWriter
+from instrumentation import STATS
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
 import random
 
 
-def run(runs=100):
-    total_human = 0
-    total_alts = 0
-    total_objects = 0
-    for _ in range(runs):
-        env = Environment(100)
-        env.place_bio_hazards(1000)
-        env.place_humans(30)
-        clean_cells = env.get_clean_area_coordinates()
-        if not clean_cells:
-            continue
-        start = tuple(random.choice(clean_cells))
-        agent = Agent(start)
-        action = Action()
-        mv = Movement(env, agent)
-        rnd = Random(agent, action, mv)
-        steps = 0
-        while agent.active and steps < 1000:
-            moved = rnd.perform_random_move()
-            steps += 1
-            if not moved:
+_layouts = {}
+# per-episode results, in the order run_episode returns them
+METRICS = ("human_encounters", "alternative_paths_used", "waste_collected")
+
+
+def _layout(size):
+    if size not in _layouts:
+        _layouts[size] = Layout(size)
+    return _layouts[size]
+
+
+def simulate_episode(seed=None, size=100, bio_hazards=1000, humans=30, max_steps=1000,
+                     predrawn=False, strategy="random", stop_when_clean=False,
+                     human_motion=None):
+    # a seed re-seeds both global generators so the episode is reproducible
+    # regardless of which process runs it. predrawn=True instead drives
+    # placement, the start cell and every move from one np.random.Generator
+    # seeded with seed, leaving the global generators untouched. Returns the
+    # finished Agent, or None when no clean start cell is left. strategy is
+    # "random" or "gradient". stop_when_clean ends the episode once no hazard
+    # is left in the agent's connected component, and skips the walk
+    # entirely when there was none to begin with. human_motion is None for
+    # static humans, or a HumanDynamics mode moving them before every step.
+    rng = None
+    if predrawn:
+        rng = np.random.default_rng(seed)
+    elif seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    layout = _layout(size)
+    env = layout.acquire()
+    try:
+        return _run_agent(env, bio_hazards, humans, max_steps, rng, strategy, stop_when_clean,
+                          human_motion, layout.neighbour_table())
+    finally:
+        layout.release(env)
+
+
+def run_episode(seed=None, size=100, bio_hazards=1000, humans=30, max_steps=1000,
+                predrawn=False, strategy="random", stop_when_clean=False, human_motion=None):
+    agent = simulate_episode(seed, size, bio_hazards, humans, max_steps, predrawn, strategy,
+                             stop_when_clean, human_motion)
+    if agent is None:
+        return 0, 0, 0
+    return (getattr(agent, "human_encounters", 0),
+            getattr(agent, "alternative_paths_used", 0),
+            getattr(agent, "waste_collected", 0))
+
+
+def _run_agent(env, bio_hazards, humans, max_steps, rng=None, strategy="random",
+               stop_when_clean=False, human_motion=None, neighbour_table=None):
+    env.place_bio_hazards(bio_hazards, rng)
+    env.place_humans(humans, rng)
+    clean = env.count_clean_areas()
+    if not clean:
+        return None
+    if rng is None:
+        # same draw as random.choice over get_clean_area_coordinates(), without
+        # materialising every clean cell as a Python list
+        start = env.nth_clean_cell(random.randrange(clean))
+    else:
+        start = env.nth_clean_cell(int(rng.integers(clean)))
+    agent = Agent(start)
+    if stop_when_clean and not env.count_reachable_bio_hazards(start):
+        agent.stop("No reachable bio-hazards")
+        return agent
+    action = Action()
+    mv = Movement(env, agent)
+    field = None
+    if strategy == "gradient":
+        gradient = Gradient(agent, action, mv)
+        field = gradient.field
+        move = gradient.perform_move
+    elif strategy == "random":
+        # the table path makes the same moves as the default one, faster
+        move = Random(agent, action, mv, neighbour_table, rng=rng,
+                      steps=max(1, max_steps)).perform_random_move
+    else:
+        raise ValueError("unknown strategy %r" % (strategy,))
+    dynamics = None
+    if human_motion is not None:
+        dynamics = HumanDynamics(env, human_motion, rng=rng)
+    steps = 0
+    collected = 0
+    while agent.active and steps < max_steps:
+        if dynamics is not None:
+            dynamics.step(avoid=[agent.get_current_position()])
+            if field is not None:
+                field.update_humans(dynamics.vacated, dynamics.occupied)
+        moved = move()
+        steps += 1
+        if not moved:
+            break
+        if stop_when_clean and agent.waste_collected != collected:
+            # components include diagonal links, so every cell the agent
+            # can reach, detours included, counts as reachable
+            collected = agent.waste_collected
+            if not env.count_reachable_bio_hazards(agent.get_current_position()):
+                agent.stop("Component clean")
                 break
-        total_human += getattr(agent, "human_encounters", 0)
-        total_alts += getattr(agent, "alternative_paths_used", 0)
-        total_objects += getattr(agent, "waste_collected", 0)
+    return agent
 
+
+def episode_seeds(seed, runs, start=0):
+    # seeds of episodes start..start+runs-1; child i of the SeedSequence is
+    # built straight from its spawn key, so any slice can be computed alone
+    root = np.random.SeedSequence(seed)
+    return [int(np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (i,))
+                .generate_state(1)[0]) for i in range(start, start + runs)]
+
+
+def _report(total_human, total_alts, total_objects):
     print("-- Number of human encountered:", total_human)
     print("-- Number of nearest path selected and avoided:", total_alts)
     print("-- Number of object collected:", total_objects)
+    return total_human, total_alts, total_objects
+
+
+def run(runs=100, instrument=False):
+    # instrument=True resets and enables instrumentation.STATS for the run;
+    # the counters stay readable through STATS.snapshot() afterwards
+    total_human = 0
+    total_alts = 0
+    total_objects = 0
+    if instrument:
+        STATS.reset()
+        STATS.enable()
+    try:
+        for _ in range(runs):
+            human, alts, objects = run_episode()
+            total_human += human
+            total_alts += alts
+            total_objects += objects
+    finally:
+        if instrument:
+            STATS.disable()
+
+    totals = _report(total_human, total_alts, total_objects)
+    if instrument:
+        print("-- Instrumentation:")
+        print(STATS.format_report())
+    return totals
+
+
+def run_adaptive(ci_width=1.0, max_runs=10000, min_runs=10, confidence=0.95, seed=None):
+    # runs episodes until the confidence interval of every per-episode mean
+    # is at most ci_width wide (a number, or a dict keyed like METRICS), or
+    # max_runs is reached. With a seed, episode i uses episode_seeds(seed, n)[i].
+    widths = ci_width if isinstance(ci_width, dict) else dict.fromkeys(METRICS, ci_width)
+    seeds = np.random.SeedSequence(seed) if seed is not None else None
+    stats = RunningStats(METRICS)
+    totals = [0, 0, 0]
+    converged = False
+    while stats.count < max_runs:
+        if seeds is None:
+            result = run_episode()
+        else:
+            result = run_episode(int(seeds.spawn(1)[0].generate_state(1)[0]))
+        stats.add(result)
+        for k, value in enumerate(result):
+            totals[k] += value
+        if stats.count >= min_runs:
+            current = stats.ci_width(confidence)
+            if all(current[name] <= widths[name] for name in METRICS):
+                converged = True
+                break
+
+    _report(*totals)
+    if converged:
+        print("-- Episodes used:", stats.count)
+    else:
+        print("-- Episodes used:", stats.count, "(max_runs reached)")
+    return {
+        "episodes": stats.count,
+        "converged": converged,
+        "totals": tuple(totals),
+        "mean": stats.mean(),
+        "ci_width": stats.ci_width(confidence),
+    }
+
+
+def run_parallel(runs=100, workers=None, seed=0):
+    workers = workers or os.cpu_count() or 1
+    seeds = episode_seeds(seed, runs)
+    total_human = 0
+    total_alts = 0
+    total_objects = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, runs // (workers * 4))
+        for human, alts, objects in pool.map(run_episode, seeds, chunksize=chunksize):
+            total_human += human
+            total_alts += alts
+            total_objects += objects
+
+    return _report(total_human, total_alts, total_objects)
+
+
+def run_batched(runs=100, batch_size=1024, seed=None):
+    sim = BatchSimulation(100, min(batch_size, runs), 1000, 30, seed=seed)
+    total_human = 0
+    total_alts = 0
+    total_objects = 0
+    for start in range(0, runs, sim.batch_size):
+        totals = sim.run(1000, episodes=min(sim.batch_size, runs - start))
+        total_human += totals["human_encounters"]
+        total_alts += totals["alternative_paths_used"]
+        total_objects += totals["waste_collected"]
+
+    return _report(total_human, total_alts, total_objects)
+
+
+def run_archived(directory, runs=100, seed=0, size=100, bio_hazards=1000, humans=30,
+                 max_steps=1000):
+    # writes every episode to an EpisodeArchive in place of the text report
+    config = dict(size=size, bio_hazards=bio_hazards, humans=humans, max_steps=max_steps)
+    total_human = 0
+    total_alts = 0
+    total_objects = 0
+    with ArchiveWriter(directory, max_size=size) as writer:
+        for episode_seed in episode_seeds(seed, runs):
+            agent = simulate_episode(episode_seed, **config)
+            if agent is None:
+                continue
+            writer.add(agent, seed=episode_seed, **config)
+            total_human += getattr(agent, "human_encounters", 0)
+            total_alts += getattr(agent, "alternative_paths_used", 0)
+            total_objects += agent.waste_collected
+
+    return _report(total_human, total_alts, total_objects)
 
 
 if __name__ == "__main__":
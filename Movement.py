@@ -1,3 +1,6 @@
+from instrumentation import STATS
+
+
 class Movement:
     def __init__(self, environment, agent):
         self.environment = environment
@@ -8,17 +11,27 @@ class Movement:
         current_position = tuple(current_position)
 
         if not bool(self.environment.is_inside_grid(next_position)):
+            if STATS.enabled:
+                STATS.count("movement.reject.border")
             if hasattr(self.agent, "stop"):
                 self.agent.stop("Hit border")
             return False
 
         if not bool(self.environment.is_accessible(next_position)):
+            if STATS.enabled:
+                STATS.count("movement.reject.inaccessible")
             return False
 
         if next_position in visited_positions:
+            if STATS.enabled:
+                STATS.count("movement.reject.visited")
             return False
 
         if next_position == current_position:
+            if STATS.enabled:
+                STATS.count("movement.reject.same_cell")
             return False
 
+        if STATS.enabled:
+            STATS.count("movement.accept")
         return True
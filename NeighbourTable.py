@@ -0,0 +1,38 @@
+from array import array
+import numpy as np
+
+OUTSIDE = -2
+BLOCKED = -1
+
+
+class NeighbourTable:
+    # Flat neighbour index of every cell for each action, built once from the
+    # static obstacle layout. Entries are OUTSIDE for moves leaving the grid
+    # and BLOCKED for inaccessible cells; humans and hazards are dynamic and
+    # still have to be read from the grid.
+    def __init__(self, grid, actions):
+        self.rows, self.cols = grid.shape
+        self.directions = {name: k for k, name in enumerate(actions)}
+        cells = self.rows * self.cols
+        r, c = np.divmod(np.arange(cells), self.cols)
+        blocked = grid.ravel() == 2
+
+        table = np.empty((cells, len(self.directions)), dtype=np.int32)
+        for k, (dr, dc) in enumerate(actions.values()):
+            nr, nc = r + dr, c + dc
+            inside = (nr >= 0) & (nr < self.rows) & (nc >= 0) & (nc < self.cols)
+            flat = np.where(inside, nr * self.cols + nc, 0)
+            table[:, k] = np.where(inside, np.where(blocked[flat], BLOCKED, flat), OUTSIDE)
+        self.table = table
+        # array('i') gives plain-int scalar reads, much cheaper than numpy indexing
+        self.flat = array("i", table.ravel().tobytes())
+        self.width = len(self.directions)
+
+    def index(self, position):
+        return position[0] * self.cols + position[1]
+
+    def position(self, index):
+        return divmod(index, self.cols)
+
+    def neighbour(self, index, name):
+        return self.flat[index * self.width + self.directions[name]]
@@ -1,20 +1,89 @@
+import itertools
 import random
+import time
+from Agent import VisitedBitmap
+from NeighbourTable import OUTSIDE
 from human_avoidance import handle_human_encounter
+from instrumentation import STATS
 
 
 class Random:
-    def __init__(self, agent, action_module, movement_validator):
+    # With rng (a np.random.Generator) the direction order of each step is
+    # one of the 24 permutations of the actions, drawn `steps` at a time in
+    # a single rng.integers call instead of random.shuffle on a fresh list.
+    # With a NeighbourTable a step reads flat neighbour indices, grid cells
+    # and a flat visited bytearray directly; it takes the same draws and
+    # makes the same moves as the default path.
+    def __init__(self, agent, action_module, movement_validator, neighbour_table=None,
+                 rng=None, steps=1000):
         self.agent = agent
         self.action_module = action_module
         self.movement_validator = movement_validator
+        self.neighbour_table = neighbour_table
+        self.rng = rng
+        self.steps = steps
+        self.permutations = list(itertools.permutations(action_module.get_all_actions()))
+        self._orders = []
+        self._cursor = 0
+        if neighbour_table is not None:
+            # table columns of the actions, in get_all_actions order; shuffling
+            # this list uses the same draws as shuffling the action names
+            self._table_actions = [neighbour_table.directions[name]
+                                   for name in action_module.get_all_actions()]
+            if rng is not None:
+                self._table_permutations = [
+                    tuple(neighbour_table.directions[name] for name in order)
+                    for order in self.permutations]
+            self._cells = None
+            self._cells_grid = None
+            self._visited = None
+            self._visited_steps = None
+
+    def _next_permutation(self):
+        if self._cursor == len(self._orders):
+            self._orders = self.rng.integers(0, len(self.permutations), self.steps).tolist()
+            self._cursor = 0
+        self._cursor += 1
+        return self._orders[self._cursor - 1]
+
+    def get_state(self):
+        # the orders drawn from rng but not used yet; with the generator's
+        # own state this is all a resumed walk needs to repeat the original
+        return {"orders": self._orders[self._cursor:], "steps": self.steps}
+
+    def set_state(self, state):
+        self._orders = list(state["orders"])
+        self._cursor = 0
+        self.steps = state["steps"]
+
+    def _action_order(self):
+        if self.rng is None:
+            actions = self.action_module.get_all_actions()
+            random.shuffle(actions)
+            return actions
+        return self.permutations[self._next_permutation()]
 
     def perform_random_move(self):
-        actions = self.action_module.get_all_actions()
-        random.shuffle(actions)
+        if STATS.enabled:
+            start = time.perf_counter_ns()
+            moved = self._select_move()
+            STATS.record("random.perform_random_move", time.perf_counter_ns() - start)
+            STATS.count("random.steps")
+            if not moved:
+                STATS.count("random.no_valid_moves")
+            return moved
+        return self._select_move()
+
+    def _select_move(self):
+        # instrumented runs take the default path, which counts every probe
+        if self.neighbour_table is not None and not STATS.enabled:
+            return self._perform_table_move()
+        actions = self._action_order()
         env = getattr(self.movement_validator, "environment", None)
 
         # quick adjacency check: if any neighboring cell has a human, handle it
-        if env:
+        near_human = bool(env) and env.is_near_human(self.agent.get_current_position())
+        if near_human:
             ar, ac = self.agent.get_current_position()
             for name in actions:
                 dr, dc = self.action_module.get_action_delta(name)
@@ -30,7 +99,7 @@ class Random:
             dr, dc = self.action_module.get_action_delta(name)
             ar, ac = self.agent.get_current_position()
             new = (ar + dr, ac + dc)
-            if env and env.is_human(new):
+            if near_human and env.is_human(new):
                 # delegate to human_avoidance logic
                 if handle_human_encounter(self.agent, env, self.movement_validator):
                     return True
@@ -43,3 +112,88 @@ class Random:
                 return True
         self.agent.stop("No valid moves")
         return False
+
+    def _grid_cells(self, env):
+        # flat, plain-int view of env.grid in whatever integer dtype it has;
+        # grids are C-contiguous unless a caller hands in a strided obstacle
+        # map, which falls back to .flat
+        grid = env.grid
+        if self._cells_grid is not grid:
+            if grid.flags.c_contiguous:
+                self._cells = memoryview(grid.reshape(-1))
+            else:
+                self._cells = grid.flat
+            self._cells_grid = grid
+        return self._cells
+
+    def _visited_cells(self):
+        # flat visited flags: a VisitedBitmap's own bytes, otherwise a
+        # bytearray mirroring the agent's set, rebuilt whenever the agent
+        # moved without this object knowing
+        visited = self.agent.visited_positions
+        if isinstance(visited, VisitedBitmap):
+            return visited.bits
+        if self._visited_steps != self.agent.steps_taken:
+            table = self.neighbour_table
+            self._visited = bytearray(table.rows * table.cols)
+            for r, c in visited:
+                self._visited[r * table.cols + c] = 1
+            self._visited_steps = self.agent.steps_taken
+        return self._visited
+
+    def _encounter(self, env, visited):
+        if not handle_human_encounter(self.agent, env, self.movement_validator):
+            return False
+        r, c = self.agent.current_position
+        visited[r * self.neighbour_table.cols + c] = 1
+        self._visited_steps = self.agent.steps_taken
+        return True
+
+    def _perform_table_move(self):
+        if self.rng is None:
+            order = self._table_actions[:]
+            random.shuffle(order)
+        else:
+            order = self._table_permutations[self._next_permutation()]
+        agent = self.agent
+        env = self.movement_validator.environment
+        table = self.neighbour_table
+        flat = table.flat
+        cells = self._grid_cells(env)
+        visited = self._visited_cells()
+        r, c = agent.current_position
+        base = (r * table.cols + c) * table.width
+
+        # as in the default path, a human next to the agent is handled first
+        for k in order:
+            target = flat[base + k]
+            if target >= 0 and cells[target] == 3:
+                for k in order:
+                    target = flat[base + k]
+                    if target >= 0 and cells[target] == 3 and self._encounter(env, visited):
+                        return True
+                break
+
+        for k in order:
+            target = flat[base + k]
+            if target < 0:
+                if target == OUTSIDE:
+                    agent.stop("Hit border")
+                continue
+            cell = cells[target]
+            if cell == 3:
+                if self._encounter(env, visited):
+                    return True
+                continue
+            if visited[target]:
+                continue
+            new = divmod(target, table.cols)
+            agent.update_position(new)
+            visited[target] = 1
+            self._visited_steps = agent.steps_taken
+            if cell == 1:
+                env.clean_cell(new)
+                agent.collect_waste()
+            return True
+        agent.stop("No valid moves")
+        return False
@@ -0,0 +1,36 @@
+import math
+from statistics import NormalDist
+
+
+class RunningStats:
+    # Welford online mean and variance for a fixed set of named metrics
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.count = 0
+        self.means = [0.0] * len(self.names)
+        self.m2 = [0.0] * len(self.names)
+
+    def add(self, values):
+        self.count += 1
+        n = self.count
+        for k, value in enumerate(values):
+            delta = value - self.means[k]
+            self.means[k] += delta / n
+            self.m2[k] += delta * (value - self.means[k])
+
+    def mean(self):
+        return dict(zip(self.names, self.means))
+
+    def variance(self):
+        # sample variance; zero until there are two observations
+        if self.count < 2:
+            return dict.fromkeys(self.names, 0.0)
+        return {name: m2 / (self.count - 1) for name, m2 in zip(self.names, self.m2)}
+
+    def ci_width(self, confidence=0.95):
+        # full width of the normal-approximation interval for each mean
+        if self.count < 2:
+            return dict.fromkeys(self.names, math.inf)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return {name: 2 * z * math.sqrt(var / self.count)
+                for name, var in self.variance().items()}
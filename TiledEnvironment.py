@@ -0,0 +1,346 @@
+import numpy as np
+from Environment import floor_plan_walls, SPARSE_PLACEMENT_MIN_CELLS, SPARSE_PLACEMENT_MAX_DENSITY
+from HazardIndex import HazardIndex
+from instrumentation import STATS
+
+# tiles are TILE_SIZE x TILE_SIZE int8 blocks, clipped at the bottom and
+# right edges, so a touched tile costs 4 KiB
+TILE_SIZE = 64
+
+
+class TiledEnvironment:
+    # Environment backend for grids too large to allocate densely, with the
+    # same cell queries, placement, cleaning and count_* methods. The grid is
+    # cut into tiles: a tile that is all clean or all walls is stored as that
+    # one code (untouched tiles are clean), and an int8 array is allocated
+    # only for tiles that are mixed or have been written to. Hazards and
+    # humans therefore always live in allocated tiles. Cell counts and the
+    # hazard index are updated on every write, so count_* and
+    # nearest_bio_hazard never scan the grid.
+    # size is an int or a (rows, cols) pair; obstacles is an optional grid of
+    # cell codes (see obstacle_maps) read one band of tile rows at a time, so
+    # a memory-mapped map is never loaded whole.
+    def __init__(self, size, debug=False, obstacles=None, tile_size=TILE_SIZE):
+        if obstacles is not None:
+            size = obstacles.shape
+        self.size = size
+        self.rows, self.cols = (size, size) if np.ndim(size) == 0 else (int(size[0]), int(size[1]))
+        self.debug = debug
+        self.tile_size = tile_size
+        self.tile_rows = -(-self.rows // tile_size)
+        self.tile_cols = -(-self.cols // tile_size)
+        self._tiles = {}
+        self._uniform = {}
+        self._counts = [self.rows * self.cols, 0, 0, 0]
+        self._hazard_index = HazardIndex(self.rows, self.cols)
+        if obstacles is not None:
+            self._load(obstacles)
+        else:
+            for r0, r1, c0, c1 in floor_plan_walls(self.rows, self.cols):
+                self._fill(r0, r1, c0, c1, 2)
+
+    def _tile_shape(self, key):
+        t = self.tile_size
+        return min(t, self.rows - key[0] * t), min(t, self.cols - key[1] * t)
+
+    def _materialise(self, key):
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = np.full(self._tile_shape(key), self._uniform.pop(key, 0), dtype=np.int8)
+            self._tiles[key] = tile
+        return tile
+
+    def _fill(self, r0, r1, c0, c1, value):
+        # paints a rectangle of walls or clean cells while the floor plan is
+        # built; tiles it covers completely become uniform again
+        t = self.tile_size
+        for tr in range(r0 // t, (r1 - 1) // t + 1):
+            for tc in range(c0 // t, (c1 - 1) // t + 1):
+                key = (tr, tc)
+                h, w = self._tile_shape(key)
+                top, left = tr * t, tc * t
+                rs, re = max(r0 - top, 0), min(r1 - top, h)
+                cs, ce = max(c0 - left, 0), min(c1 - left, w)
+                tile = self._tiles.get(key)
+                if tile is None:
+                    self._counts[self._uniform.get(key, 0)] -= (re - rs) * (ce - cs)
+                else:
+                    before = np.bincount(tile[rs:re, cs:ce].ravel(), minlength=4)
+                    for k in range(4):
+                        self._counts[k] -= int(before[k])
+                self._counts[value] += (re - rs) * (ce - cs)
+                if (re - rs, ce - cs) == (h, w):
+                    self._tiles.pop(key, None)
+                    self._uniform.pop(key, None)
+                    if value:
+                        self._uniform[key] = value
+                else:
+                    self._materialise(key)[rs:re, cs:ce] = value
+
+    def _load(self, obstacles):
+        t = self.tile_size
+        pad = self.tile_cols * t - self.cols
+        counts = np.zeros(4, dtype=np.int64)
+        for tr in range(self.tile_rows):
+            band = np.asarray(obstacles[tr * t:(tr + 1) * t]).astype(np.int8)
+            counts += np.bincount(band.ravel(), minlength=4)[:4]
+            # edge padding repeats real cells, so it never makes a tile mixed
+            blocks = np.pad(band, ((0, 0), (0, pad)), mode="edge").reshape(len(band), -1, t)
+            lo, hi = blocks.min(axis=(0, 2)), blocks.max(axis=(0, 2))
+            uniform = (lo == hi) & ((lo == 0) | (lo == 2))
+            for tc in np.flatnonzero(~uniform).tolist():
+                self._tiles[(tr, tc)] = band[:, tc * t:(tc + 1) * t].copy()
+            for tc in np.flatnonzero(uniform & (lo == 2)).tolist():
+                self._uniform[(tr, tc)] = 2
+            hazards = np.argwhere(band == 1)
+            hazards[:, 0] += tr * t
+            self._hazard_index.add_many(hazards)
+        self._counts = [int(n) for n in counts]
+
+    def _groups(self, rows, cols):
+        # (tile key, indices into rows/cols) for every tile the cells fall in
+        t = self.tile_size
+        keys = (rows // t) * self.tile_cols + cols // t
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for key, where in zip(keys[starts].tolist(), np.split(order, starts[1:])):
+            yield divmod(key, self.tile_cols), where
+
+    def _cell(self, r, c):
+        t = self.tile_size
+        key = (r // t, c // t)
+        tile = self._tiles.get(key)
+        if tile is None:
+            return self._uniform.get(key, 0)
+        return tile.item(r % t, c % t)
+
+    def _cells(self, rows, cols):
+        t = self.tile_size
+        values = np.zeros(len(rows), dtype=np.int8)
+        for key, where in self._groups(rows, cols):
+            tile = self._tiles.get(key)
+            if tile is None:
+                values[where] = self._uniform.get(key, 0)
+            else:
+                values[where] = tile[rows[where] % t, cols[where] % t]
+        return values
+
+    def _set_cells(self, rows, cols, value):
+        t = self.tile_size
+        for key, where in self._groups(rows, cols):
+            self._materialise(key)[rows[where] % t, cols[where] % t] = value
+
+    def _scan_counts(self):
+        counts = [0, 0, 0, 0]
+        area = 0
+        for tile in self._tiles.values():
+            for k, n in enumerate(np.bincount(tile.ravel(), minlength=4)[:4].tolist()):
+                counts[k] += n
+            area += tile.size
+        for key, value in self._uniform.items():
+            h, w = self._tile_shape(key)
+            counts[value] += h * w
+            area += h * w
+        counts[0] += self.rows * self.cols - area
+        return counts
+
+    def _class_counts(self):
+        if self.debug:
+            actual = self._scan_counts()
+            if actual != self._counts:
+                raise AssertionError(
+                    "cell counts out of sync: tracked %s, tiles have %s" % (self._counts, actual))
+        return self._counts
+
+    def allocated_tiles(self):
+        return len(self._tiles)
+
+    def allocated_bytes(self):
+        return sum(tile.nbytes for tile in self._tiles.values())
+
+    def to_dense(self):
+        # the whole grid as one int8 array; only sensible for small grids
+        grid = np.zeros((self.rows, self.cols), dtype=np.int8)
+        t = self.tile_size
+        for (tr, tc), value in self._uniform.items():
+            grid[tr * t:(tr + 1) * t, tc * t:(tc + 1) * t] = value
+        for (tr, tc), tile in self._tiles.items():
+            grid[tr * t:(tr + 1) * t, tc * t:(tc + 1) * t] = tile
+        return grid
+
+    def _clean_cells(self):
+        # flat indices of every clean cell in row-major order, built one band
+        # of tile rows at a time
+        t = self.tile_size
+        found = []
+        for tr in range(self.tile_rows):
+            band = np.zeros((min(t, self.rows - tr * t), self.cols), dtype=np.int8)
+            for tc in range(self.tile_cols):
+                tile = self._tiles.get((tr, tc))
+                if tile is None:
+                    band[:, tc * t:(tc + 1) * t] = self._uniform.get((tr, tc), 0)
+                else:
+                    band[:, tc * t:(tc + 1) * t] = tile
+            found.append(np.flatnonzero(band == 0) + tr * t * self.cols)
+        return np.concatenate(found)
+
+    def _sample_clean(self, count, rng=None):
+        # uniform sample of distinct clean cells, drawn as
+        # Environment._select_empty_cells draws them: rejection sampling for
+        # sparse placements on large grids, otherwise a choice among the
+        # enumerated clean cells
+        clean = self._counts[0]
+        count = min(int(count), clean)
+        if count <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if (self.rows * self.cols >= SPARSE_PLACEMENT_MIN_CELLS
+                and count * SPARSE_PLACEMENT_MAX_DENSITY <= clean):
+            return np.divmod(self._sample_sparse(count, clean, rng), self.cols)
+        cells = self._clean_cells()
+        if rng is None:
+            selected = np.random.choice(len(cells), count, replace=False)
+        else:
+            selected = rng.choice(len(cells), count, replace=False)
+        return np.divmod(cells[selected], self.cols)
+
+    def _sample_sparse(self, count, clean, rng=None):
+        # rejection sampling on flat indices, as Environment._sample_sparse,
+        # reading each candidate's tile instead of a dense grid; cells are
+        # kept in first-drawn order, with a set to drop repeats
+        total = self.rows * self.cols
+        chosen = []
+        seen = set()
+        while len(chosen) < count:
+            draws = int((count - len(chosen)) * total / clean * 1.1) + 16
+            if rng is None:
+                cand = np.random.randint(0, total, draws, dtype=np.int64)
+            else:
+                cand = rng.integers(0, total, draws)
+            rows, cols = np.divmod(cand, self.cols)
+            for cell in cand[self._cells(rows, cols) == 0].tolist():
+                if cell not in seen:
+                    seen.add(cell)
+                    chosen.append(cell)
+                    if len(chosen) == count:
+                        break
+        return np.array(chosen, dtype=np.int64)
+
+    def random_clean_cell(self, rng=None):
+        rows, cols = self._sample_clean(1, rng)
+        if not len(rows):
+            return None
+        return int(rows[0]), int(cols[0])
+
+    def _clear(self, value):
+        removed = 0
+        for tile in self._tiles.values():
+            mask = tile == value
+            removed += int(np.count_nonzero(mask))
+            tile[mask] = 0
+        self._counts[0] += removed
+        self._counts[value] -= removed
+
+    def place_bio_hazards(self, bio_hazard_count, rng=None):
+        if bio_hazard_count <= 0:
+            self._clear(1)
+            self._hazard_index.clear()
+            return 0
+        rows, cols = self._sample_clean(bio_hazard_count, rng)
+        self._set_cells(rows, cols, 1)
+        self._hazard_index.add_many(np.column_stack((rows, cols)))
+        self._counts[0] -= len(rows)
+        self._counts[1] += len(rows)
+        return int(len(rows))
+
+    def place_humans(self, human_count, rng=None):
+        if human_count <= 0:
+            self._clear(3)
+            return 0
+        rows, cols = self._sample_clean(human_count, rng)
+        self._set_cells(rows, cols, 3)
+        self._counts[0] -= len(rows)
+        self._counts[3] += len(rows)
+        return int(len(rows))
+
+    def is_inside_grid(self, position):
+        if position is None or len(position) != 2:
+            return False
+        r, c = position
+        return bool(0 <= r < self.rows and 0 <= c < self.cols)
+
+    def is_accessible(self, position):
+        if not self.is_inside_grid(position):
+            return False
+        return self._cell(*position) != 2
+
+    def is_bio_hazard(self, position):
+        if not self.is_inside_grid(position):
+            return False
+        return self._cell(*position) == 1
+
+    def is_clean(self, position):
+        if not self.is_inside_grid(position):
+            return False
+        return self._cell(*position) == 0
+
+    def is_human(self, position):
+        if STATS.enabled:
+            STATS.count("environment.is_human")
+        if not self.is_inside_grid(position):
+            return False
+        return self._cell(*position) == 3
+
+    def is_near_human(self, position):
+        if STATS.enabled:
+            STATS.count("environment.is_near_human")
+        if not self.is_inside_grid(position):
+            return False
+        r, c = position
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < self.rows and 0 <= nc < self.cols and self._cell(nr, nc) == 3:
+                return True
+        return False
+
+    def clean_cell(self, position):
+        if not self.is_bio_hazard(position):
+            return False
+        if STATS.enabled:
+            STATS.count("environment.clean_cell")
+        r, c = position
+        t = self.tile_size
+        self._tiles[(r // t, c // t)][r % t, c % t] = 0
+        self._hazard_index.remove((r, c))
+        self._counts[1] -= 1
+        self._counts[0] += 1
+        return True
+
+    def move_human(self, source, target):
+        if not (self.is_human(source) and self.is_clean(target)):
+            return False
+        self._set_cells(np.array([source[0]]), np.array([source[1]]), 0)
+        self._set_cells(np.array([target[0]]), np.array([target[1]]), 3)
+        return True
+
+    def count_bio_hazards(self):
+        return self._class_counts()[1]
+
+    def count_inaccessible_areas(self):
+        return self._class_counts()[2]
+
+    def count_clean_areas(self):
+        return self._class_counts()[0]
+
+    def count_accessible_areas(self):
+        return self.rows * self.cols - self._class_counts()[2]
+
+    def get_bio_hazard_coordinates(self):
+        # row-major, as Environment lists them
+        return [list(p) for p in sorted(p for bucket in self._hazard_index.buckets.values()
+                                        for p in bucket)]
+
+    def nearest_bio_hazard(self, position):
+        if STATS.enabled:
+            return STATS.timed("environment.nearest_bio_hazard",
+                               self._hazard_index.nearest, position)
+        return self._hazard_index.nearest(position)
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import Main  # noqa: E402
+from Action import Action  # noqa: E402
+from Agent import Agent  # noqa: E402
+from Layout import Layout  # noqa: E402
+from Movement import Movement  # noqa: E402
+from Random import Random  # noqa: E402
+from human_avoidance import handle_human_encounter  # noqa: E402
+
+# python benchmarks/bench_hotpaths.py --quick
+# python benchmarks/bench_hotpaths.py --save-baseline
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = (100, 1000, 5000)
+QUICK_SIZES = (100, 1000)
+# (name, hazards as a fraction of clean cells, humans as a fraction of clean cells)
+DENSITIES = (
+    ("sparse", 0.01, 0.0005),
+    ("crowded", 0.1, 0.005),
+)
+
+
+def _populate(layout, hazard_density, human_density):
+    env = layout.acquire()
+    clean = env.count_clean_areas()
+    env.place_bio_hazards(max(1, int(clean * hazard_density)))
+    env.place_humans(max(1, int(clean * human_density)))
+    return env
+
+
+def _repeat(min_time, body):
+    # calls body() until min_time has elapsed; body returns its unit count
+    units = 0
+    start = time.perf_counter()
+    while True:
+        units += body()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return units, elapsed
+
+
+def _peak_memory(body):
+    tracemalloc.start()
+    try:
+        body()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_random_move(layout, hazard_density, human_density, min_time):
+    random.seed(0)
+    np.random.seed(0)
+    env = _populate(layout, hazard_density, human_density)
+    starts = iter([env.nth_clean_cell(random.randrange(env.count_clean_areas()))
+                   for _ in range(4096)])
+
+    def walk():
+        agent = Agent(next(starts))
+        rnd = Random(agent, Action(), Movement(env, agent))
+        while agent.active and agent.steps_taken < 1000:
+            if not rnd.perform_random_move():
+                break
+        return agent.steps_taken + 1
+
+    units, elapsed = _repeat(min_time, walk)
+    peak = _peak_memory(walk)
+    layout.release(env)
+    return "steps_per_sec", units / elapsed, peak
+
+
+def bench_table_move(layout, hazard_density, human_density, min_time):
+    # the same walks as bench_random_move, on the layout's NeighbourTable
+    random.seed(0)
+    np.random.seed(0)
+    env = _populate(layout, hazard_density, human_density)
+    table = layout.neighbour_table()
+    starts = iter([env.nth_clean_cell(random.randrange(env.count_clean_areas()))
+                   for _ in range(4096)])
+
+    def walk():
+        agent = Agent(next(starts))
+        rnd = Random(agent, Action(), Movement(env, agent), neighbour_table=table)
+        while agent.active and agent.steps_taken < 1000:
+            if not rnd.perform_random_move():
+                break
+        return agent.steps_taken + 1
+
+    units, elapsed = _repeat(min_time, walk)
+    peak = _peak_memory(walk)
+    layout.release(env)
+    return "steps_per_sec", units / elapsed, peak
+
+
+def bench_human_encounter(layout, hazard_density, human_density, min_time):
+    random.seed(0)
+    np.random.seed(0)
+    env = _populate(layout, hazard_density, human_density)
+    starts = [env.nth_clean_cell(random.randrange(env.count_clean_areas()))
+              for _ in range(256)]
+
+    def encounters():
+        for start in starts:
+            agent = Agent(start)
+            handle_human_encounter(agent, env, Movement(env, agent))
+        return len(starts)
+
+    units, elapsed = _repeat(min_time, encounters)
+    peak = _peak_memory(encounters)
+    layout.release(env)
+    return "calls_per_sec", units / elapsed, peak
+
+
+def bench_place_bio_hazards(layout, hazard_density, human_density, min_time):
+    np.random.seed(0)
+
+    def place():
+        env = _populate(layout, hazard_density, human_density)
+        layout.release(env)
+        return 1
+
+    units, elapsed = _repeat(min_time, place)
+    peak = _peak_memory(place)
+    return "episodes_per_sec", units / elapsed, peak
+
+
+def bench_main_run(layout, hazard_density, human_density, min_time):
+    clean = layout.counts[0]
+    config = dict(size=layout.size, bio_hazards=max(1, int(clean * hazard_density)),
+                  humans=max(1, int(clean * human_density)), max_steps=1000)
+    seeds = iter(range(1 << 30))
+
+    def episode():
+        Main.run_episode(next(seeds), **config)
+        return 1
+
+    units, elapsed = _repeat(min_time, episode)
+    peak = _peak_memory(episode)
+    return "episodes_per_sec", units / elapsed, peak
+
+
+BENCHMARKS = (
+    ("perform_random_move", bench_random_move),
+    ("perform_table_move", bench_table_move),
+    ("handle_human_encounter", bench_human_encounter),
+    ("place_bio_hazards", bench_place_bio_hazards),
+    ("Main.run", bench_main_run),
+)
+
+
+def run_benchmarks(sizes=SIZES, densities=DENSITIES, min_time=1.0, benchmarks=BENCHMARKS):
+    results = []
+    for size in sizes:
+        layout = Layout(size)
+        Main._layouts[size] = layout
+        for density_name, hazard_density, human_density in densities:
+            for name, bench in benchmarks:
+                metric, value, peak = bench(layout, hazard_density, human_density, min_time)
+                results.append({
+                    "key": "%s/%d/%s" % (name, size, density_name),
+                    "benchmark": name,
+                    "size": size,
+                    "density": density_name,
+                    "metric": metric,
+                    "value": value,
+                    "peak_memory_bytes": peak,
+                })
+        del Main._layouts[size]
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, threshold):
+    # every metric is a rate, so a regression is a drop beyond the threshold
+    reference = {r["key"]: r["value"] for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        expected = reference.get(result["key"])
+        if expected is None:
+            continue
+        ratio = result["value"] / expected
+        result["baseline"] = expected
+        result["ratio"] = ratio
+        if ratio < 1.0 - threshold:
+            regressions.append(result["key"])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the simulation hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--quick", action="store_true",
+                        help="sizes %s and shorter timing windows" % (QUICK_SIZES,))
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed fractional slowdown against the baseline")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    min_time = min(args.min_time, 0.2) if args.quick else args.min_time
+    report = run_benchmarks(sizes, min_time=min_time)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            regressions = compare_to_baseline(report, json.load(fh), args.threshold)
+    report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    for key in regressions:
+        print("REGRESSION: %s" % key, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
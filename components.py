@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def label_components(open_cells, diagonal=False):
+    # 4-connected components of a boolean grid (8-connected with diagonal),
+    # as an int32 array holding 0..count-1 on open cells and -1 elsewhere,
+    # numbered in row-major order of each component's first cell.
+    # Horizontal runs of open cells are labelled first with a cumsum, so the
+    # union step only sees one node per run. Run parents are then hooked
+    # onto the smaller root across every vertical (and diagonal) edge and
+    # fully compressed by pointer jumping, repeated until no edge joins two
+    # roots.
+    rows, cols = open_cells.shape
+    starts = open_cells.copy()
+    starts[:, 1:] &= ~open_cells[:, :-1]
+    run = np.cumsum(starts.reshape(-1)).reshape(rows, cols) - 1
+    runs = int(run[-1, -1]) + 1 if run.size else 0
+
+    upper, lower = [run[:-1, :]], [run[1:, :]]
+    links = [open_cells[:-1, :] & open_cells[1:, :]]
+    if diagonal:
+        upper += [run[:-1, :-1], run[:-1, 1:]]
+        lower += [run[1:, 1:], run[1:, :-1]]
+        links += [open_cells[:-1, :-1] & open_cells[1:, 1:],
+                  open_cells[:-1, 1:] & open_cells[1:, :-1]]
+    edges = np.unique(np.concatenate([u[m] * runs + d[m]
+                                      for u, d, m in zip(upper, lower, links)]))
+    a, b = np.divmod(edges, max(runs, 1))
+
+    parent = np.arange(runs)
+    while True:
+        pa, pb = parent[a], parent[b]
+        differ = pa != pb
+        if not differ.any():
+            break
+        a, b = a[differ], b[differ]
+        lo, hi = np.minimum(pa[differ], pb[differ]), np.maximum(pa[differ], pb[differ])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    roots, component = np.unique(parent, return_inverse=True)
+    labels = np.full((rows, cols), -1, dtype=np.int32)
+    labels[open_cells] = component.ravel()[run[open_cells]]
+    return labels, len(roots)
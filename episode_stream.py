@@ -0,0 +1,112 @@
+from collections import namedtuple
+import os
+import numpy as np
+
+# one fixed-size binary record per step, as written to spill files
+STEP_DTYPE = np.dtype([
+    ("step", "<u4"),
+    ("row", "<i4"),
+    ("col", "<i4"),
+    ("flags", "u1"),
+    ("encounters", "u1"),
+])
+
+MOVED = 1
+COLLECTED = 2
+ALTERNATIVE = 4
+STOPPED = 8
+
+StepRecord = namedtuple("StepRecord", "step row col flags encounters")
+
+
+def _step_function(strategy):
+    move = getattr(strategy, "perform_move", None)
+    return move if move is not None else strategy.perform_random_move
+
+
+def iter_steps(env, agent, strategy, max_steps=None, spill=None):
+    # Yields one StepRecord per strategy call, with the same loop rules as
+    # Main.run. env is accepted for symmetry with the strategies, which
+    # already hold it. spill is an optional TrajectoryWriter; pair it with
+    # Agent(record_path=False) to run long episodes in bounded memory.
+    move = _step_function(strategy)
+    step = 0
+    while agent.active and (max_steps is None or step < max_steps):
+        steps = agent.steps_taken
+        waste = agent.waste_collected
+        alternatives = agent.alternative_paths_used
+        encounters = agent.human_encounters
+
+        moved = move()
+        step += 1
+
+        flags = 0
+        if agent.steps_taken != steps:
+            flags |= MOVED
+        if agent.waste_collected != waste:
+            flags |= COLLECTED
+        if agent.alternative_paths_used != alternatives:
+            flags |= ALTERNATIVE
+        if not moved or not agent.active:
+            flags |= STOPPED
+        r, c = agent.get_current_position()
+        record = StepRecord(step, int(r), int(c), flags,
+                            min(agent.human_encounters - encounters, 255))
+        if spill is not None:
+            spill.write(record)
+        yield record
+        if not moved:
+            break
+
+
+class TrajectoryWriter:
+    # Buffers step records and appends them to path in chunks of chunk_size
+    # records, so memory use is fixed however long the episode runs.
+    def __init__(self, path, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffer = np.zeros(chunk_size, dtype=STEP_DTYPE)
+        self.pending = 0
+        self.written = 0
+        self.file = open(path, "wb")
+
+    def write(self, record):
+        self.buffer[self.pending] = tuple(record)
+        self.pending += 1
+        if self.pending == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.written += self.pending
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def iter_trajectory(path, chunk_size=4096):
+    # reads a spill file back one chunk (structured STEP_DTYPE array) at a time
+    with open(path, "rb") as fh:
+        while True:
+            chunk = np.fromfile(fh, dtype=STEP_DTYPE, count=chunk_size)
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+
+def load_trajectory(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=STEP_DTYPE)
+    return np.memmap(path, dtype=STEP_DTYPE, mode="r")
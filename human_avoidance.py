@@ -1,11 +1,22 @@
+from instrumentation import STATS
+
+
 def handle_human_encounter(agent, env, movement_validator):
+    if STATS.enabled:
+        return STATS.timed("human_avoidance.handle_human_encounter",
+                           _handle_human_encounter, agent, env, movement_validator)
+    return _handle_human_encounter(agent, env, movement_validator)
+
+
+def _handle_human_encounter(agent, env, movement_validator):
     
     agent.human_encounters += 1
-    bio = env.get_bio_hazard_coordinates()
-    if not bio:
-        return False
     ar, ac = agent.get_current_position()
-    nearest = min(bio, key=lambda b: abs(b[0] - ar) + abs(b[1] - ac))
+    nearest = env.nearest_bio_hazard((ar, ac))
+    if nearest is None:
+        if STATS.enabled:
+            STATS.count("human_avoidance.no_hazard")
+        return False
     tr, tc = nearest
     sdr = (tr > ar) - (tr < ar)
     sdc = (tc > ac) - (tc < ac)
@@ -20,8 +31,12 @@ def handle_human_encounter(agent, env, movement_validator):
         if movement_validator.is_move_valid(agent.get_current_position(), cand, getattr(agent, "visited_positions", set())):
             agent.update_position(cand)
             agent.alternative_paths_used += 1
+            if STATS.enabled:
+                STATS.count("human_avoidance.detour")
             if env.is_bio_hazard(cand):
                 env.clean_cell(cand)
                 agent.collect_waste()
             return True
+    if STATS.enabled:
+        STATS.count("human_avoidance.blocked")
     return False
@@ -0,0 +1,69 @@
+import time
+
+
+class Instrumentation:
+    # Opt-in counters and nanosecond timers for the stepping hot path.
+    # Call sites guard on `STATS.enabled`, so when disabled the cost is one
+    # attribute read per probe.
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.timers = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters = {}
+        self.timers = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, elapsed_ns):
+        # timer layout: [calls, total_ns, max_ns, log2 histogram buckets...]
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0, 0] + [0] * 64
+        timer[0] += 1
+        timer[1] += elapsed_ns
+        if elapsed_ns > timer[2]:
+            timer[2] = elapsed_ns
+        timer[3 + min(elapsed_ns.bit_length(), 63)] += 1
+
+    def timed(self, name, func, *args):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def snapshot(self):
+        timers = {}
+        for name, timer in self.timers.items():
+            calls, total, longest = timer[:3]
+            timers[name] = {
+                "calls": calls,
+                "total_ns": total,
+                "mean_ns": total / calls if calls else 0.0,
+                "max_ns": longest,
+                # bucket k holds calls taking [2**(k-1), 2**k) ns
+                "histogram": {"<%d" % (1 << k): n for k, n in enumerate(timer[3:]) if n},
+            }
+        return {"counters": dict(sorted(self.counters.items())), "timers": timers}
+
+    def format_report(self):
+        snap = self.snapshot()
+        lines = []
+        for name, value in snap["counters"].items():
+            lines.append("   %-45s %d" % (name, value))
+        for name, timer in sorted(snap["timers"].items()):
+            lines.append("   %-45s %d calls, mean %.0f ns, max %d ns" % (
+                name, timer["calls"], timer["mean_ns"], timer["max_ns"]))
+        return "\n".join(lines)
+
+
+STATS = Instrumentation()
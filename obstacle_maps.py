@@ -0,0 +1,135 @@
+import os
+import numpy as np
+from Environment import Environment, COUNT_CHUNK_CELLS
+
+# Obstacle maps are grids of cell codes (0 clean, 1 bio-hazard, 2
+# inaccessible, 3 human) read from one of:
+#   .npy            integer cell codes, or bool with True for inaccessible.
+#                   Opened with mmap_mode="c": pages are read on first touch
+#                   and copied privately on first write, so the file is
+#                   never modified and a huge floor plan costs nothing up front.
+#   .pgm .pbm .pnm  netpbm images (P1, P2, P4, P5); dark pixels are walls
+#   anything else   text, one row per line: '#', 'X' or '2' inaccessible,
+#                   '*' or '1' bio-hazard, 'H' or '3' human, anything else clean
+# Rows of a text map may differ in length; short rows are padded clean.
+
+TEXT_CODES = np.zeros(256, dtype=np.int8)
+for _chars, _code in ((b"#X2", 2), (b"*1", 1), (b"H3", 3)):
+    TEXT_CODES[np.frombuffer(_chars, dtype=np.uint8)] = _code
+
+
+def load_obstacle_map(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        return _load_npy(path)
+    if ext in (".pgm", ".pbm", ".pnm"):
+        return _load_netpbm(path)
+    return _load_text(path)
+
+
+def load_environment(path, debug=False):
+    return Environment(None, debug=debug, obstacles=load_obstacle_map(path))
+
+
+def _load_npy(path):
+    grid = np.load(path, mmap_mode="c")
+    if grid.ndim != 2:
+        raise ValueError("%s: obstacle map must be 2-D, got shape %s" % (path, grid.shape))
+    if grid.dtype == np.bool_:
+        return _wall_codes(grid.shape, lambda start, stop: grid[start:stop])
+    if grid.dtype.kind not in "iu":
+        raise ValueError("%s: obstacle map must hold integer cell codes, got %s"
+                         % (path, grid.dtype))
+    flat = grid.reshape(-1)
+    for start in range(0, flat.size, COUNT_CHUNK_CELLS):
+        chunk = flat[start:start + COUNT_CHUNK_CELLS]
+        if chunk.min() < 0 or chunk.max() > 3:
+            raise ValueError("%s: cell codes must be 0..3, found %d..%d"
+                             % (path, chunk.min(), chunk.max()))
+    return grid
+
+
+def _wall_codes(shape, walls):
+    # int8 cell codes from a wall mask, built band by band straight into the
+    # result; walls(start, stop) returns the mask of rows start..stop
+    rows, cols = shape
+    grid = np.empty(shape, dtype=np.int8)
+    band = max(1, COUNT_CHUNK_CELLS // max(cols, 1))
+    for start in range(0, rows, band):
+        stop = min(start + band, rows)
+        np.multiply(walls(start, stop), np.int8(2), out=grid[start:stop])
+    return grid
+
+
+def _load_text(path):
+    with open(path, "rb") as fh:
+        lines = fh.read().splitlines()
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if not lines:
+        raise ValueError("%s: empty obstacle map" % path)
+    grid = np.zeros((len(lines), max(len(line) for line in lines)), dtype=np.int8)
+    for r, line in enumerate(lines):
+        grid[r, :len(line)] = TEXT_CODES[np.frombuffer(line, dtype=np.uint8)]
+    return grid
+
+
+def _netpbm_header(data, fields):
+    # magic number followed by `fields` whitespace-separated integers, with
+    # '#' comments allowed between tokens; returns the values and the offset
+    # of the single whitespace byte that ends the header
+    values = []
+    pos = 2
+    while len(values) < fields:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b"#":
+            pos = data.index(b"\n", pos)
+            continue
+        start = pos
+        while pos < len(data) and data[pos:pos + 1].isdigit():
+            pos += 1
+        if start == pos:
+            raise ValueError("malformed netpbm header")
+        values.append(int(data[start:pos]))
+    return values, pos + 1
+
+
+def _load_netpbm(path):
+    with open(path, "rb") as fh:
+        data = fh.read(1024)
+    magic = data[:2]
+    if magic in (b"P1", b"P4"):
+        (cols, rows), offset = _netpbm_header(data, 2)
+        if magic == b"P4":
+            # one bit per pixel, rows padded to whole bytes; 1 is black
+            packed = np.memmap(path, dtype=np.uint8, mode="r", offset=offset,
+                               shape=(rows, (cols + 7) // 8))
+            return _wall_codes((rows, cols), lambda start, stop: np.unpackbits(
+                packed[start:stop], axis=1, count=cols).view(bool))
+        pixels = _ascii_pixels(path, offset, rows, cols)
+        return _wall_codes((rows, cols), lambda start, stop: pixels[start:stop] == 1)
+    elif magic in (b"P2", b"P5"):
+        (cols, rows, maxval), offset = _netpbm_header(data, 3)
+        if magic == b"P5":
+            dtype = np.uint8 if maxval < 256 else np.dtype(">u2")
+            pixels = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(rows, cols))
+        else:
+            pixels = _ascii_pixels(path, offset, rows, cols)
+        threshold = (maxval + 1) // 2
+        return _wall_codes((rows, cols), lambda start, stop: pixels[start:stop] < threshold)
+    raise ValueError("%s: unsupported image format %r" % (path, magic))
+
+
+def _ascii_pixels(path, offset, rows, cols):
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        body = b"\n".join(line.split(b"#")[0] for line in fh.read().splitlines())
+    # P1 allows pixels without separators, so split every digit run of a
+    # bitmap into single digits before parsing
+    tokens = body.split()
+    if all(len(t) == 1 for t in tokens) or rows * cols == len(tokens):
+        values = np.array(tokens, dtype=np.int64)
+    else:
+        values = np.frombuffer(b"".join(tokens), dtype=np.uint8) - ord("0")
+    return values.reshape(rows, cols)
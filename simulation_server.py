@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import Main
+
+# Line protocol, one JSON object per line in both directions.
+#
+# Jobs (client -> server):
+#   {"type": "episodes", "runs": 100, "seed": 0, "size": 100, ...}
+#   {"type": "sweep", "runs": 20, "seed": 0, "points": [{"humans": 0}, {"humans": 30}]}
+# Any of CONFIG_KEYS may be given at the top level; sweep points override
+# them per point. An optional "id" is echoed back on every reply.
+#
+# Replies (server -> client), each tagged with "job":
+#   {"event": "accepted", "episodes": n, "configs": [...]}
+#   {"event": "episode", "index": i, "config": k, "seed": s, <EPISODE_FIELDS>}
+#   {"event": "progress", "done": d, "total": n, "totals": {...}}
+#   {"event": "done", "totals": {...}, "per_config": [{...}, ...]}
+#   {"event": "error", "message": "..."}
+# Episodes stream in completion order, so use "index" to reorder them.
+#
+# python simulation_server.py --port 8765
+# python simulation_server.py --unix /tmp/simulation.sock
+
+EPISODE_FIELDS = ("human_encounters", "alternative_paths_used", "waste_collected")
+CONFIG_KEYS = ("size", "bio_hazards", "humans", "max_steps", "predrawn", "strategy",
+               "stop_when_clean")
+
+
+def _run_chunk(seed, first, count, config):
+    # seeds are derived in the worker, so the event loop never spawns them
+    seeds = Main.episode_seeds(seed, count, first)
+    return seeds, [Main.run_episode(s, **config) for s in seeds]
+
+
+def job_configs(job):
+    kind = job.get("type", "episodes")
+    base = {key: job[key] for key in CONFIG_KEYS if key in job}
+    if kind == "episodes":
+        return [base]
+    if kind == "sweep":
+        points = job.get("points")
+        if not points:
+            raise ValueError("sweep jobs need a non-empty 'points' list")
+        configs = []
+        for point in points:
+            unknown = set(point) - set(CONFIG_KEYS)
+            if unknown:
+                raise ValueError("unknown sweep parameters: %s" % ", ".join(sorted(unknown)))
+            configs.append(dict(base, **point))
+        return configs
+    raise ValueError("unknown job type %r" % (kind,))
+
+
+def _summary(totals, episodes):
+    summary = dict(totals, episodes=episodes)
+    summary["mean_waste_collected"] = totals["waste_collected"] / episodes if episodes else 0.0
+    return summary
+
+
+class SimulationServer:
+    # Accepts jobs from any number of connections and runs their episodes
+    # on one shared process pool, chunk_size episodes per task. Each job
+    # keeps at most `window` tasks in flight, so concurrent jobs interleave
+    # on the pool instead of queueing behind each other; the event loop only
+    # parses lines and forwards results.
+    def __init__(self, workers=None, chunk_size=4, progress_every=10):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.progress_every = progress_every
+        self.window = self.workers * 2
+        self.pool = None
+        self._ids = itertools.count(1)
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        if self.pool is None:
+            # forked workers would inherit the client sockets open at fork
+            # time and keep them from closing, so start workers from a clean
+            # forkserver (spawn where that is unavailable)
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["Main"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def handle(self, reader, writer):
+        lock = asyncio.Lock()
+        jobs = set()
+
+        async def send(message):
+            async with lock:
+                writer.write((json.dumps(message) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    job = json.loads(line)
+                    if not isinstance(job, dict):
+                        raise ValueError("a job must be a JSON object")
+                    configs = job_configs(job)
+                    runs = int(job.get("runs", 1))
+                    seed = int(job.get("seed", 0))
+                except (ValueError, TypeError) as exc:
+                    await send({"event": "error", "message": str(exc)})
+                    continue
+                job_id = job.get("id", next(self._ids))
+                task = asyncio.create_task(self._run_job(job_id, configs, runs, seed, send))
+                jobs.add(task)
+                task.add_done_callback(jobs.discard)
+            # the client closed its side; finish streaming what it submitted
+            if jobs:
+                await asyncio.gather(*jobs, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in jobs:
+                task.cancel()
+            writer.close()
+
+    async def _run_job(self, job_id, configs, runs, seed, send):
+        loop = asyncio.get_running_loop()
+        episodes = runs * len(configs)
+        chunks = ((k, start, min(self.chunk_size, runs - start))
+                  for k in range(len(configs)) for start in range(0, runs, self.chunk_size))
+        totals = dict.fromkeys(EPISODE_FIELDS, 0)
+        per_config = [dict.fromkeys(EPISODE_FIELDS, 0) for _ in configs]
+        done = 0
+        await send({"job": job_id, "event": "accepted", "episodes": episodes,
+                    "configs": configs})
+
+        pending = {}
+
+        def submit():
+            for k, start, count in itertools.islice(chunks, self.window - len(pending)):
+                future = loop.run_in_executor(self.pool, _run_chunk, seed, k * runs + start,
+                                              count, configs[k])
+                pending[future] = (k, start)
+
+        try:
+            submit()
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    k, start = pending.pop(future)
+                    try:
+                        chunk, results = future.result()
+                    except Exception as exc:
+                        await send({"job": job_id, "event": "error", "message": repr(exc)})
+                        return
+                    for offset, (seed_used, result) in enumerate(zip(chunk, results)):
+                        episode = dict(zip(EPISODE_FIELDS, result))
+                        for name, value in episode.items():
+                            totals[name] += value
+                            per_config[k][name] += value
+                        done += 1
+                        await send(dict(episode, job=job_id, event="episode",
+                                        index=k * runs + start + offset, config=k,
+                                        seed=seed_used))
+                        if done % self.progress_every == 0 and done < episodes:
+                            await send({"job": job_id, "event": "progress", "done": done,
+                                        "total": episodes, "totals": _summary(totals, done)})
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+
+        await send({"job": job_id, "event": "done", "totals": _summary(totals, done),
+                    "per_config": [_summary(t, runs) for t in per_config]})
+
+
+async def serve(host="127.0.0.1", port=8765, path=None, workers=None):
+    server = SimulationServer(workers)
+    listener = await server.start(host, port, path)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve simulation jobs as NDJSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Action import Action
+from Agent import Agent, VisitedBitmap, PathBuffer
+from Environment import Environment
+from Movement import Movement
+from Random import Random
+
+# A snapshot is a set of arrays plus a JSON-able dict of scalars:
+#   grid        Environment.grid
+#   visited     bool mask of the agent's visited cells
+#   path        int32 (n, 2) agent path, if the agent records one
+#   collected   int32 (n, 2) collected hazard coordinates, if recorded
+#   np_keys     uint32 key vector of the legacy np.random state
+# plus the agent's counters, the `random` and np.random states, the
+# state of an optional np.random.Generator and, for a Random strategy
+# driven by that generator, the direction orders it has drawn but not yet
+# used (see Random.get_state).
+#
+# save_snapshot writes the arrays as .npy files next to state.json;
+# load_snapshot maps the grid back with mmap_mode="c", so the restored
+# Environment reads pages on first touch and copies them privately on
+# first write. SharedSnapshot packs the same arrays into one
+# multiprocessing.shared_memory block whose picklable descriptor can be
+# sent to workers; attach_snapshot gives each worker its own copy of the
+# grid (one memcpy, no rebuild) so branches never see each other's moves.
+
+FORMAT_VERSION = 1
+
+
+def _capture(env, agent=None, rng=None, strategy=None):
+    arrays = {"grid": env.grid}
+    state = {
+        "version": FORMAT_VERSION,
+        "size": env.size if np.ndim(env.size) == 0 else [int(n) for n in env.size],
+        "debug": env.debug,
+        "counts": list(env._class_counts()),
+        "python_random": _encode(random.getstate()),
+    }
+    np_state = np.random.get_state()
+    arrays["np_keys"] = np_state[1]
+    state["np_random"] = [np_state[0], int(np_state[2]), int(np_state[3]), float(np_state[4])]
+    if rng is not None:
+        state["generator"] = rng.bit_generator.state
+    if strategy is not None:
+        state["strategy"] = strategy.get_state()
+
+    if agent is not None:
+        visited = np.zeros(env.grid.shape, dtype=bool)
+        if isinstance(agent.visited_positions, VisitedBitmap):
+            visited.reshape(-1)[:] = np.frombuffer(agent.visited_positions.bits, dtype=np.uint8)
+        elif agent.visited_positions:
+            visited[tuple(np.array(list(agent.visited_positions)).T)] = True
+        arrays["visited"] = visited
+        if agent.path is not None:
+            arrays["path"] = np.array(list(agent.path), dtype=np.int32).reshape(-1, 2)
+        if agent.collected_positions is not None:
+            arrays["collected"] = np.array(agent.collected_positions,
+                                           dtype=np.int32).reshape(-1, 2)
+        state["agent"] = {
+            "current_position": [int(v) for v in agent.current_position],
+            "active": agent.active,
+            "stop_reason": agent.stop_reason,
+            "steps_taken": agent.steps_taken,
+            "waste_collected": agent.waste_collected,
+            "human_encounters": getattr(agent, "human_encounters", 0),
+            "alternative_paths_used": getattr(agent, "alternative_paths_used", 0),
+            "compact": isinstance(agent.visited_positions, VisitedBitmap),
+        }
+    return arrays, state
+
+
+def _encode(value):
+    # random.getstate() nests tuples, which JSON would turn into lists
+    if isinstance(value, tuple):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return tuple(_decode(v) for v in value)
+    return value
+
+
+def _rebuild(arrays, state, grid, restore_global, return_strategy=False):
+    if state.get("version") != FORMAT_VERSION:
+        raise ValueError("unsupported snapshot version %s" % state.get("version"))
+    env = Environment(None, debug=state["debug"], obstacles=grid)
+    env.size = state["size"] if np.ndim(state["size"]) == 0 else tuple(state["size"])
+    env._counts = list(state["counts"])
+
+    if restore_global:
+        random.setstate(_decode(state["python_random"]))
+        name, pos, has_gauss, cached = state["np_random"]
+        np.random.set_state((name, np.array(arrays["np_keys"]), pos, has_gauss, cached))
+
+    rng = None
+    if "generator" in state:
+        bit_generator = getattr(np.random, state["generator"]["bit_generator"])()
+        bit_generator.state = state["generator"]
+        rng = np.random.Generator(bit_generator)
+
+    agent = None
+    if "agent" in state:
+        saved = state["agent"]
+        agent = Agent(tuple(saved["current_position"]),
+                      grid_shape=env.grid.shape if saved["compact"] else None,
+                      record_path="path" in arrays)
+        visited = np.asarray(arrays["visited"])
+        if saved["compact"]:
+            bitmap = agent.visited_positions
+            bitmap.bits[:] = visited.astype(np.uint8).tobytes()
+            bitmap.count = int(visited.sum())
+        else:
+            agent.visited_positions = set(map(tuple, np.argwhere(visited).tolist()))
+        if "path" in arrays:
+            path = np.asarray(arrays["path"], dtype=np.int32)
+            if saved["compact"]:
+                agent.path = PathBuffer()
+                agent.path.coords.frombytes(path.tobytes())
+            else:
+                agent.path = list(map(tuple, path.tolist()))
+        if "collected" in arrays:
+            agent.collected_positions = list(map(tuple, np.asarray(arrays["collected"]).tolist()))
+        for name in ("active", "stop_reason", "steps_taken", "waste_collected",
+                     "human_encounters", "alternative_paths_used"):
+            setattr(agent, name, saved[name])
+    if return_strategy:
+        return env, agent, rng, state.get("strategy")
+    return env, agent, rng
+
+
+def save_snapshot(directory, env, agent=None, rng=None, strategy=None):
+    arrays, state = _capture(env, agent, rng, strategy)
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, name + ".npy"), array)
+    state["arrays"] = sorted(arrays)
+    with open(os.path.join(directory, "state.json"), "w") as fh:
+        json.dump(state, fh)
+
+
+def load_snapshot(directory, restore_global=True, return_strategy=False):
+    # returns (env, agent, rng); agent and rng are None when not saved.
+    # restore_global also resets the random and np.random global states.
+    # return_strategy appends the saved strategy state (or None), to be
+    # passed to Random.set_state on the strategy that resumes the walk.
+    with open(os.path.join(directory, "state.json")) as fh:
+        state = json.load(fh)
+    arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="c")
+              for name in state["arrays"]}
+    return _rebuild(arrays, state, arrays["grid"], restore_global, return_strategy)
+
+
+class SharedSnapshot:
+    def __init__(self, env, agent=None, rng=None, strategy=None):
+        arrays, state = _capture(env, agent, rng, strategy)
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = (offset, array.shape, array.dtype.str)
+            offset += -(-array.nbytes // 64) * 64
+        # one spare block so empty arrays at the end still get a valid offset
+        self.shm = shared_memory.SharedMemory(create=True, size=offset + 64)
+        for name, array in arrays.items():
+            start, shape, dtype = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=start)[...] = array
+        self.descriptor = {"name": self.shm.name, "layout": layout, "state": state}
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def attach_snapshot(descriptor, restore_global=True, return_strategy=False):
+    shm = shared_memory.SharedMemory(name=descriptor["name"])
+    try:
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+                  for name, (start, shape, dtype) in descriptor["layout"].items()}
+        grid = arrays["grid"].copy()
+        restored = _rebuild(arrays, descriptor["state"], grid, restore_global, return_strategy)
+        # every other array has been converted into private objects by now
+        del arrays
+    finally:
+        shm.close()
+    return restored
+
+
+def _continue_branch(descriptor, seed, max_steps):
+    env, agent, _ = attach_snapshot(descriptor)
+    random.seed(seed)
+    np.random.seed(seed)
+    rnd = Random(agent, Action(), Movement(env, agent))
+    while agent.active and agent.steps_taken < max_steps:
+        if not rnd.perform_random_move():
+            break
+    return agent.human_encounters, agent.alternative_paths_used, agent.waste_collected
+
+
+def run_branches(env, agent, seeds, max_steps=1000, workers=None):
+    # continues the same mid-episode state once per seed on a process pool
+    # and returns each branch's (human_encounters, alternative_paths_used,
+    # waste_collected), in seed order
+    with SharedSnapshot(env, agent) as shared:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_continue_branch, [shared.descriptor] * len(seeds), seeds,
+                                 [max_steps] * len(seeds)))
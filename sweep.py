@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import Main
+
+# A sweep directory holds sweep.json (runs and seed, checked on resume) and
+# one cell-<key>.npz shard per finished config cell. Shards are written to
+# a temporary name and renamed into place, so a shard exists only once its
+# cell is complete and an interrupted sweep resumes by skipping them.
+# Every shard has the same columns, one row per episode:
+#   size, bio_hazards, humans, max_steps, episode, seed, skipped,
+#   steps_taken, waste_collected, human_encounters, alternative_paths_used
+# skipped is True for episodes that never ran because no clean start cell
+# was left; their result columns are zero and must be left out of means.
+#
+# python sweep.py results/ --sizes 50 100 --humans 0 30 --runs 20
+
+PARAMETERS = ("size", "bio_hazards", "humans", "max_steps")
+RESULT_COLUMNS = ("steps_taken", "waste_collected", "human_encounters",
+                  "alternative_paths_used")
+
+
+def expand_grid(sizes=(100,), bio_hazards=(1000,), humans=(30,), max_steps=(1000,)):
+    return [dict(zip(PARAMETERS, values))
+            for values in itertools.product(sizes, bio_hazards, humans, max_steps)]
+
+
+def cell_key(config):
+    text = json.dumps([config[name] for name in PARAMETERS])
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _shard_path(directory, config):
+    return os.path.join(directory, "cell-%s.npz" % cell_key(config))
+
+
+def _run_cell(config, runs, seed):
+    # seeds depend on the cell itself, not on its position in the grid, so
+    # adding or reordering cells leaves finished ones valid
+    seeds = Main.episode_seeds([seed] + [config[name] for name in PARAMETERS], runs)
+    columns = {name: np.zeros(runs, dtype=np.int64) for name in RESULT_COLUMNS}
+    columns["skipped"] = np.zeros(runs, dtype=bool)
+    for i, episode_seed in enumerate(seeds):
+        agent = Main.simulate_episode(episode_seed, **config)
+        if agent is None:
+            columns["skipped"][i] = True
+            continue
+        columns["steps_taken"][i] = agent.steps_taken
+        columns["waste_collected"][i] = agent.waste_collected
+        columns["human_encounters"][i] = getattr(agent, "human_encounters", 0)
+        columns["alternative_paths_used"][i] = getattr(agent, "alternative_paths_used", 0)
+    for name in PARAMETERS:
+        columns[name] = np.full(runs, config[name], dtype=np.int64)
+    columns["episode"] = np.arange(runs, dtype=np.int64)
+    columns["seed"] = np.array(seeds, dtype=np.uint64)
+    return columns
+
+
+def _write_shard(directory, config, columns):
+    path = _shard_path(directory, config)
+    partial = path + ".partial"
+    with open(partial, "wb") as fh:
+        np.savez(fh, **columns)
+    os.replace(partial, path)
+
+
+def _check_meta(directory, runs, seed):
+    path = os.path.join(directory, "sweep.json")
+    meta = {"runs": runs, "seed": seed}
+    if os.path.exists(path):
+        with open(path) as fh:
+            saved = json.load(fh)
+        if saved != meta:
+            raise ValueError("%s was started with %s, not %s" % (directory, saved, meta))
+    else:
+        with open(path, "w") as fh:
+            json.dump(meta, fh)
+
+
+def pending_cells(directory, configs):
+    return [config for config in configs if not os.path.exists(_shard_path(directory, config))]
+
+
+def run_sweep(directory, configs, runs=10, seed=0, workers=None):
+    # runs every cell without a shard yet and returns how many it ran
+    os.makedirs(directory, exist_ok=True)
+    _check_meta(directory, runs, seed)
+    todo = pending_cells(directory, configs)
+    if not todo:
+        return 0
+    if workers == 1:
+        for config in todo:
+            _write_shard(directory, config, _run_cell(config, runs, seed))
+        return len(todo)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_cell, config, runs, seed): config for config in todo}
+        for future in as_completed(futures):
+            _write_shard(directory, futures[future], future.result())
+    return len(todo)
+
+
+def load_results(directory):
+    # every finished shard concatenated column by column
+    shards = sorted(name for name in os.listdir(directory)
+                    if name.startswith("cell-") and name.endswith(".npz"))
+    columns = {}
+    for name in shards:
+        with np.load(os.path.join(directory, name)) as shard:
+            for column in shard.files:
+                columns.setdefault(column, []).append(shard[column])
+    return {column: np.concatenate(parts) for column, parts in columns.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a resumable parameter sweep.")
+    parser.add_argument("directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100])
+    parser.add_argument("--bio-hazards", type=int, nargs="+", default=[1000])
+    parser.add_argument("--humans", type=int, nargs="+", default=[30])
+    parser.add_argument("--max-steps", type=int, nargs="+", default=[1000])
+    parser.add_argument("--runs", type=int, default=10, help="episodes per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    configs = expand_grid(args.sizes, args.bio_hazards, args.humans, args.max_steps)
+    ran = run_sweep(args.directory, configs, args.runs, args.seed, args.workers)
+    print("-- Cells run: %d, already done: %d" % (ran, len(configs) - ran))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from Agent import Agent
+from Agent import Agent, VisitedBitmap, PathBuffer
 import unittest
 import sys
 import os
@@ -135,6 +135,59 @@ class TestAgent(unittest.TestCase):
         self.assertEqual(self.agent_1.steps_taken, 50)
         self.assertEqual(self.agent_1.steps_taken, len(self.agent_1.path) - 1)
 
+    def test_compact_mode_storage(self):
+        agent = Agent((5, 5), grid_shape=(20, 30))
+        self.assertIsInstance(agent.visited_positions, VisitedBitmap)
+        self.assertIsInstance(agent.path, PathBuffer)
+        agent.update_position((5, 6))
+        agent.update_position((6, 6))
+        self.assertTrue(agent.has_visited((5, 6)))
+        self.assertFalse(agent.has_visited((7, 7)))
+        self.assertFalse(agent.has_visited((-1, 5)))
+        self.assertFalse(agent.has_visited((5, 30)))
+        self.assertIn((6, 6), agent.visited_positions)
+        self.assertEqual(len(agent.visited_positions), 3)
+        self.assertEqual(sorted(agent.visited_positions),
+                         [(5, 5), (5, 6), (6, 6)])
+        self.assertEqual(agent.get_path(), [(5, 5), (5, 6), (6, 6)])
+        self.assertEqual(agent.path[-1], (6, 6))
+        self.assertEqual(agent.path[1:], [(5, 6), (6, 6)])
+        self.assertEqual(agent.steps_taken, len(agent.path) - 1)
+        self.assertEqual(agent.get_statistics()["steps_taken"], 2)
+
+    def test_compact_mode_revisit_counts_once(self):
+        agent = Agent((1, 1), grid_shape=(4, 4))
+        agent.update_position((1, 2))
+        agent.update_position((1, 1))
+        self.assertEqual(len(agent.visited_positions), 2)
+        self.assertEqual(len(agent.path), 3)
+        with self.assertRaises(IndexError):
+            agent.visited_positions.add((4, 0))
+
+    def test_compact_mode_matches_default_walk(self):
+        import random
+        import numpy as np
+        from Environment import Environment
+        from Action import Action
+        from Movement import Movement
+        from Random import Random
+
+        paths = []
+        for shape in (None, (100, 100)):
+            random.seed(3)
+            np.random.seed(3)
+            env = Environment(100)
+            env.place_bio_hazards(1000)
+            env.place_humans(30)
+            agent = Agent(tuple(random.choice(
+                env.get_clean_area_coordinates())), grid_shape=shape)
+            rnd = Random(agent, Action(), Movement(env, agent))
+            while agent.active and agent.steps_taken < 300:
+                if not rnd.perform_random_move():
+                    break
+            paths.append((agent.get_path(), agent.get_statistics()))
+        self.assertEqual(paths[0], paths[1])
+
 
 if __name__ == '__main__':
     unittest.main()
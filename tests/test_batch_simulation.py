@@ -0,0 +1,84 @@
+import random
+import numpy as np
+from Environment import Environment
+from Agent import Agent
+from Action import Action
+from Movement import Movement
+from Random import Random
+from BatchSimulation import BatchSimulation
+
+# python -m pytest -q tests/test_batch_simulation.py
+
+
+def _scalar_move(env, agent, order):
+    names = Action().get_all_actions()
+    rnd = Random(agent, Action(), Movement(env, agent))
+    orig_shuffle = random.shuffle
+    try:
+        random.shuffle = lambda x: x.__setitem__(
+            slice(None), [names[i] for i in order])
+        return rnd.perform_random_move()
+    finally:
+        random.shuffle = orig_shuffle
+
+
+def test_lockstep_matches_scalar_rules():
+    np.random.seed(7)
+    rng = np.random.default_rng(7)
+    batch = 16
+    sim = BatchSimulation(30, batch, seed=7)
+    envs, agents = [], []
+    for i in range(batch):
+        env = Environment(30)
+        env.place_bio_hazards(150)
+        env.place_humans(60)
+        start = tuple(env.get_clean_area_coordinates()[i * 7])
+        envs.append(env)
+        agents.append(Agent(start))
+        sim.load_episode(i, env.grid, start)
+
+    for _ in range(200):
+        orders = np.argsort(rng.random((batch, 4)), axis=1)
+        running = sim.running.copy()
+        sim.step(orders)
+        for i in np.flatnonzero(running):
+            moved = _scalar_move(envs[i], agents[i], orders[i])
+            if not moved or not agents[i].active:
+                assert not sim.running[i]
+            r, c = divmod(int(sim.positions[i]), 30)
+            assert agents[i].get_current_position() == (r, c)
+            assert agents[i].waste_collected == sim.waste_collected[i]
+            assert agents[i].human_encounters == sim.human_encounters[i]
+            assert agents[i].alternative_paths_used == sim.alternative_paths_used[i]
+            assert np.array_equal(envs[i].grid, sim.grids[i])
+    assert sim.alternative_paths_used.sum() > 0
+
+
+def test_reset_places_requested_counts():
+    sim = BatchSimulation(100, 8, bio_hazard_count=1000, human_count=30, seed=1)
+    sim.reset()
+    for i in range(8):
+        assert np.sum(sim.grids[i] == 1) == 1000
+        assert np.sum(sim.grids[i] == 3) == 30
+        assert np.array_equal(sim.grids[i] == 2, sim.layout == 2)
+        assert sim.flat[i, sim.positions[i]] == 0
+        assert sim.visited[i].sum() == 1
+    assert sim.running.all()
+
+
+def test_run_is_seeded_and_bounded():
+    a = BatchSimulation(40, 32, 200, 10, seed=3).run(max_steps=50)
+    b = BatchSimulation(40, 32, 200, 10, seed=3).run(max_steps=50)
+    assert a == b
+
+    sim = BatchSimulation(40, 32, 200, 10, seed=3)
+    sim.run(max_steps=50)
+    assert sim.ticks.max() <= 50
+    assert np.all(sim.steps_taken <= sim.ticks)
+
+
+def test_run_skips_episodes_without_clean_cells():
+    sim = BatchSimulation(10, 4, bio_hazard_count=1000, human_count=0, seed=0)
+    totals = sim.run(max_steps=10)
+    assert totals == {"human_encounters": 0,
+                      "alternative_paths_used": 0, "waste_collected": 0}
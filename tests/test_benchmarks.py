@@ -0,0 +1,40 @@
+import json
+from benchmarks import bench_hotpaths
+
+# python -m pytest -q tests/test_benchmarks.py
+
+
+def test_run_benchmarks_reports_every_entry_point():
+    report = bench_hotpaths.run_benchmarks(
+        sizes=(30,), densities=(("tiny", 0.05, 0.01),), min_time=0.01)
+    keys = [r["key"] for r in report["results"]]
+    assert keys == ["perform_random_move/30/tiny", "perform_table_move/30/tiny",
+                    "handle_human_encounter/30/tiny",
+                    "place_bio_hazards/30/tiny", "Main.run/30/tiny"]
+    for result in report["results"]:
+        assert result["value"] > 0
+        assert result["peak_memory_bytes"] >= 0
+    json.dumps(report)
+
+
+def test_compare_to_baseline_flags_slowdowns():
+    baseline = {"results": [{"key": "a", "value": 100.0}, {"key": "b", "value": 100.0}]}
+    report = {"results": [{"key": "a", "value": 80.0}, {"key": "b", "value": 70.0},
+                          {"key": "c", "value": 1.0}]}
+    assert bench_hotpaths.compare_to_baseline(report, baseline, 0.25) == ["b"]
+    assert report["results"][0]["ratio"] == 0.8
+    assert "baseline" not in report["results"][2]
+
+
+def test_main_exit_code_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    assert bench_hotpaths.main(["--sizes", "20", "--min-time", "0.01", "--save-baseline",
+                                "--baseline", str(baseline),
+                                "--output", str(tmp_path / "out.json")]) == 0
+    data = json.loads(baseline.read_text())
+    for result in data["results"]:
+        result["value"] *= 1000
+    baseline.write_text(json.dumps(data))
+    assert bench_hotpaths.main(["--sizes", "20", "--min-time", "0.01",
+                                "--baseline", str(baseline),
+                                "--output", str(tmp_path / "out.json")]) == 1
@@ -0,0 +1,136 @@
+import numpy as np
+import Main
+from Environment import Environment
+from Layout import Layout
+from components import label_components
+
+# python -m pytest -q tests/test_components.py
+
+
+def _flood_labels(open_cells, diagonal=False):
+    # reference labelling by flood fill, numbered in row-major first-cell order
+    rows, cols = open_cells.shape
+    labels = np.full(open_cells.shape, -1)
+    count = 0
+    for r, c in np.argwhere(open_cells):
+        if labels[r, c] >= 0:
+            continue
+        labels[r, c] = count
+        stack = [(r, c)]
+        while stack:
+            y, x = stack.pop()
+            steps = [(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)]
+            if diagonal:
+                steps += [(y - 1, x - 1), (y - 1, x + 1), (y + 1, x - 1), (y + 1, x + 1)]
+            for ny, nx in steps:
+                if 0 <= ny < rows and 0 <= nx < cols and open_cells[ny, nx] and labels[ny, nx] < 0:
+                    labels[ny, nx] = count
+                    stack.append((ny, nx))
+        count += 1
+    return labels, count
+
+
+def test_labels_match_flood_fill():
+    rng = np.random.default_rng(0)
+    for density in (0.3, 0.55, 0.7, 1.0):
+        open_cells = rng.random((40, 70)) < density
+        labels, count = label_components(open_cells)
+        expected, expected_count = _flood_labels(open_cells)
+        assert count == expected_count
+        assert np.array_equal(labels, expected)
+
+
+def test_diagonal_labels_match_flood_fill():
+    rng = np.random.default_rng(1)
+    for density in (0.2, 0.4, 0.6):
+        open_cells = rng.random((40, 70)) < density
+        labels, count = label_components(open_cells, diagonal=True)
+        expected, expected_count = _flood_labels(open_cells, diagonal=True)
+        assert count == expected_count
+        assert np.array_equal(labels, expected)
+
+
+def test_spiral_needs_many_merges():
+    open_cells = np.zeros((21, 21), dtype=bool)
+    open_cells[1::4, 1:-1] = True
+    open_cells[3::4, 1:-1] = True
+    open_cells[2::8, -2] = True
+    open_cells[4::8, 1] = True
+    labels, count = label_components(open_cells)
+    assert count == _flood_labels(open_cells)[1]
+    assert np.array_equal(labels, _flood_labels(open_cells)[0])
+
+
+def _pocket_environment():
+    env = Environment(20)
+    env.grid[:, 10] = 2
+    env.grid[3, 3] = 1
+    env.grid[4, 4] = 1
+    env.invalidate_caches()
+    return env
+
+
+def test_component_hazard_counts_follow_clean_and_place():
+    env = _pocket_environment()
+    assert env.component_of((5, 5)) != env.component_of((5, 15))
+    assert env.component_of((0, 0)) == -1
+    assert env.count_reachable_bio_hazards((5, 5)) == 2
+    assert env.count_reachable_bio_hazards((5, 15)) == 0
+    env.clean_cell((3, 3))
+    assert env.count_reachable_bio_hazards((5, 5)) == 1
+    env.clean_cells([4], [4])
+    assert env.count_reachable_bio_hazards((5, 5)) == 0
+    env.place_bio_hazards(20, rng=np.random.default_rng(1))
+    left = int(np.sum(env.grid[:, :10] == 1))
+    assert env.count_reachable_bio_hazards((5, 5)) == left
+    assert env.count_reachable_bio_hazards((5, 15)) == 20 - left
+    env.place_bio_hazards(0)
+    assert env.count_reachable_bio_hazards((5, 15)) == 0
+
+
+def test_layout_shares_component_labels():
+    layout = Layout(100)
+    first, second = layout.acquire(), layout.acquire()
+    assert first._component_labels() is second._component_labels()
+    assert not layout.component_labels().flags.writeable
+    first.place_bio_hazards(50)
+    assert first.count_reachable_bio_hazards(first.nth_clean_cell(0)) == 50
+
+
+def test_episode_stops_when_component_is_clean():
+    agent = Main.simulate_episode(0, size=20, bio_hazards=3, humans=0, strategy="gradient",
+                                  stop_when_clean=True)
+    assert agent.waste_collected == 3
+    assert agent.stop_reason == "Component clean"
+
+    plain = Main.simulate_episode(4, size=20, bio_hazards=3, humans=0)
+    early = Main.simulate_episode(4, size=20, bio_hazards=3, humans=0, stop_when_clean=True)
+    assert early.get_path() == plain.get_path()[:len(early.get_path())]
+
+    empty = Main.simulate_episode(0, size=20, bio_hazards=0, humans=0, stop_when_clean=True)
+    assert empty.stop_reason == "No reachable bio-hazards"
+    assert empty.steps_taken == 0
+
+
+def _hand_placed(rows):
+    codes = {"#": 2, "*": 1, "H": 3, ".": 0}
+    env = Environment(None, obstacles=np.array([[codes[ch] for ch in row] for row in rows],
+                                               dtype=np.int8))
+    # keep the hand-placed hazards and humans
+    env.place_bio_hazards = env.place_humans = lambda count, rng=None: 0
+    return env
+
+
+def test_diagonal_detours_stay_inside_a_component():
+    # the only clean cell (1, 2) is boxed in by walls and a human, and its
+    # hazard (2, 3) is reachable only by a diagonal detour around the human
+    rows = ["######",
+            "#H.###",
+            "###*##",
+            "######"]
+    assert _hand_placed(rows).count_reachable_bio_hazards((1, 2)) == 1
+    plain = Main._run_agent(_hand_placed(rows), 0, 0, 10)
+    early = Main._run_agent(_hand_placed(rows), 0, 0, 10, stop_when_clean=True)
+    assert plain.waste_collected == early.waste_collected == 1
+    assert early.get_path() == [(1, 2), (2, 3)]
+    assert early.stop_reason == "Component clean"
@@ -0,0 +1,114 @@
+import numpy as np
+import Main
+from Action import Action
+from Agent import Agent
+from Environment import Environment
+from Movement import Movement
+from DistanceField import DistanceField, UNREACHED
+from Gradient import Gradient
+
+# python -m pytest -q tests/test_distance_field.py
+
+
+def _bfs(grid):
+    # plain single-cell BFS reference
+    rows, cols = grid.shape
+    dist = np.full(grid.shape, UNREACHED, dtype=np.int64)
+    queue = [tuple(p) for p in np.argwhere(grid == 1)]
+    for p in queue:
+        dist[p] = 0
+    for r, c in queue:
+        for dr, dc in Action.actions.values():
+            nr, nc = r + dr, c + dc
+            if (0 <= nr < rows and 0 <= nc < cols and grid[nr, nc] not in (2, 3)
+                    and dist[nr, nc] == UNREACHED):
+                dist[nr, nc] = dist[r, c] + 1
+                queue.append((nr, nc))
+    return dist.ravel()
+
+
+def test_field_matches_bfs():
+    np.random.seed(1)
+    env = Environment(100)
+    env.place_bio_hazards(200)
+    env.place_humans(30)
+    assert np.array_equal(DistanceField(env).dist, _bfs(env.grid))
+
+
+def test_incremental_removal_matches_rebuild():
+    rng = np.random.default_rng(4)
+    env = Environment(60)
+    env.place_bio_hazards(150, rng=rng)
+    env.place_humans(10, rng=rng)
+    field = DistanceField(env)
+    hazards = env.get_bio_hazard_coordinates()
+    for k in rng.permutation(len(hazards)):
+        env.clean_cell(hazards[k])
+        assert field.remove_source(hazards[k])
+        assert np.array_equal(field.dist, _bfs(env.grid))
+    assert field.sources == 0
+    assert np.all(field.dist == UNREACHED)
+    assert not field.remove_source(hazards[0])
+
+
+def test_sync_picks_up_new_hazards():
+    env = Environment(30)
+    field = DistanceField(env)
+    assert field.distance((5, 5)) is None
+    env.place_bio_hazards(5, rng=np.random.default_rng(0))
+    field.sync()
+    assert np.array_equal(field.dist, _bfs(env.grid))
+
+
+def test_gradient_walks_shortest_path_and_collects():
+    env = Environment(20)
+    env.grid[5, 12] = 1
+    env.invalidate_caches()
+    agent = Agent((5, 5))
+    strategy = Gradient(agent, Action(), Movement(env, agent))
+    while strategy.perform_move():
+        pass
+    assert agent.waste_collected == 1
+    assert agent.get_path()[:8] == [(5, c) for c in range(5, 13)]
+    assert agent.steps_taken == 7
+    assert agent.stop_reason == "No reachable bio-hazards"
+
+
+def test_gradient_collects_more_per_step_than_random():
+    random_agent = Main.simulate_episode(3)
+    gradient_agent = Main.simulate_episode(3, strategy="gradient")
+    random_rate = random_agent.waste_collected / max(1, random_agent.steps_taken)
+    gradient_rate = gradient_agent.waste_collected / gradient_agent.steps_taken
+    assert gradient_rate > random_rate
+    assert gradient_agent.waste_collected > 10 * random_agent.waste_collected
+
+
+def test_moving_humans_patch_the_field():
+    from HumanDynamics import HumanDynamics
+    for mode, seed in (("random_walk", 0), ("waypoint", 1)):
+        rng = np.random.default_rng(seed)
+        env = Environment(60)
+        env.place_bio_hazards(40, rng=rng)
+        env.place_humans(300, rng=rng)
+        field = DistanceField(env)
+        dynamics = HumanDynamics(env, mode, rng=rng)
+        for tick in range(40):
+            dynamics.step()
+            field.update_humans(dynamics.vacated, dynamics.occupied)
+            if tick % 5 == 0:
+                hazard = tuple(np.argwhere(env.grid == 1)[0])
+                env.clean_cell(hazard)
+                field.remove_source(hazard)
+            assert np.array_equal(field.dist, _bfs(env.grid)), (mode, tick)
+
+
+def test_gradient_with_moving_humans_never_rebuilds(monkeypatch):
+    rebuilds = []
+    original = DistanceField.rebuild
+    monkeypatch.setattr(DistanceField, "rebuild",
+                        lambda self: rebuilds.append(1) or original(self))
+    agent = Main.simulate_episode(3, humans=300, strategy="gradient",
+                                  human_motion="random_walk", max_steps=300)
+    assert agent.waste_collected > 0
+    # the one rebuild is the field's construction
+    assert len(rebuilds) == 1
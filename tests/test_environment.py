@@ -1,4 +1,5 @@
 from Environment import Environment
+import Environment as Environment_module
 import unittest
 import numpy as np
 import sys
@@ -19,7 +20,7 @@ class TestEnvironment(unittest.TestCase):
         self.assertEqual(self.env_small.grid.shape, (10, 10))
         self.assertEqual(self.env_medium.size, 50)
         self.assertEqual(self.env_medium.grid.shape, (50, 50))
-        self.assertEqual(self.env_small.grid.dtype, np.int_)
+        self.assertEqual(self.env_small.grid.dtype, np.int8)
         self.assertIsInstance(self.env_small.grid, np.ndarray)
 
     def test_inaccessible_areas(self):
@@ -135,6 +136,20 @@ class TestEnvironment(unittest.TestCase):
         grid_copy_med = self.env_medium.get_grid()
         self.assertEqual(grid_copy_med.shape, (50, 50))
 
+    def test_grid_view(self):
+        view = self.env_medium.grid_view()
+        self.assertTrue(np.shares_memory(view, self.env_medium.grid))
+        self.assertFalse(view.flags.writeable)
+        with self.assertRaises(ValueError):
+            view[1, 1] = 1
+        self.env_medium.place_bio_hazards(10)
+        self.assertEqual(int(np.count_nonzero(view == 1)), 10)
+
+        region = self.env_large.grid_view(np.s_[35:61, 35:61])
+        self.assertEqual(region.shape, (26, 26))
+        self.assertTrue(np.all(region == 2))
+        self.assertFalse(region.flags.writeable)
+
     def test_edge_cases(self):
         env_min = Environment(5)
         self.assertEqual(env_min.size, 5)
@@ -155,6 +170,115 @@ class TestEnvironment(unittest.TestCase):
             self.env_small.clean_cell(tuple(pos))
         self.assertEqual(self.env_small.count_bio_hazards(), 0)
 
+    def test_counts_tracked_through_mutators(self):
+        env = Environment(100, debug=True)
+        self.assertEqual(env.count_inaccessible_areas(),
+                         int(np.sum(env.grid == 2)))
+        env.place_bio_hazards(200)
+        env.place_humans(20)
+        self.assertEqual(env.count_bio_hazards(), 200)
+        for pos in env.get_bio_hazard_coordinates()[:50]:
+            env.clean_cell(tuple(pos))
+        self.assertEqual(env.count_bio_hazards(), 150)
+        env.place_humans(0)
+        env._create_inaccessible_areas()
+        env.place_bio_hazards(0)
+        self.assertEqual(env.count_clean_areas(), int(np.sum(env.grid == 0)))
+        self.assertEqual(env.count_accessible_areas(),
+                         int(np.sum(env.grid != 2)))
+
+    def test_debug_counts_detect_direct_writes(self):
+        env = Environment(20, debug=True)
+        env.count_bio_hazards()
+        env.grid[5, 5] = 1
+        with self.assertRaises(AssertionError):
+            env.count_bio_hazards()
+        env.invalidate_caches()
+        self.assertEqual(env.count_bio_hazards(), 1)
+
+    def _dilated_humans(self, env):
+        humans = env.grid == 3
+        near = np.zeros_like(humans)
+        near[1:] |= humans[:-1]
+        near[:-1] |= humans[1:]
+        near[:, 1:] |= humans[:, :-1]
+        near[:, :-1] |= humans[:, 1:]
+        return near
+
+    def test_human_adjacency_mask(self):
+        np.random.seed(4)
+        env = Environment(50)
+        env.place_humans(40)
+        self.assertTrue(np.array_equal(env.human_adjacency_mask(),
+                                       self._dilated_humans(env)))
+        env.place_humans(25)
+        self.assertTrue(np.array_equal(env.human_adjacency_mask(),
+                                       self._dilated_humans(env)))
+        human = tuple(np.argwhere(env.grid == 3)[0])
+        self.assertTrue(env.is_near_human((human[0] + 1, human[1])) or
+                        env.grid[human[0] + 1, human[1]] == 2)
+        self.assertFalse(env.is_near_human((-1, 0)))
+
+        env.place_humans(0)
+        self.assertFalse(env.human_adjacency_mask().any())
+
+    def test_move_human_updates_adjacency(self):
+        env = Environment(10)
+        env.grid[4, 4] = 3
+        self.assertTrue(env.is_near_human((4, 5)))
+        self.assertTrue(env.move_human((4, 4), (6, 6)))
+        self.assertFalse(env.is_near_human((4, 5)))
+        self.assertTrue(env.is_near_human((6, 7)))
+        self.assertTrue(env.is_human((6, 6)))
+        self.assertFalse(env.move_human((4, 4), (5, 5)))
+        self.assertFalse(env.move_human((6, 6), (0, 0)))
+        self.assertTrue(np.array_equal(env.human_adjacency_mask(),
+                                       self._dilated_humans(env)))
+
+    def test_sparse_placement_on_large_grid(self):
+        env = Environment(1100, debug=True)
+        self.assertGreaterEqual(env.grid.size, Environment_module.SPARSE_PLACEMENT_MIN_CELLS)
+        placed = env.place_bio_hazards(500, rng=np.random.default_rng(1))
+        self.assertEqual(placed, 500)
+        self.assertEqual(int(np.sum(env.grid == 1)), 500)
+        self.assertEqual(env.place_humans(30, rng=np.random.default_rng(2)), 30)
+        self.assertEqual(int(np.sum(env.grid == 3)), 30)
+        self.assertEqual(env.count_bio_hazards(), 500)
+
+        again = Environment(1100)
+        again.place_bio_hazards(500, rng=np.random.default_rng(1))
+        self.assertTrue(np.array_equal(np.argwhere(again.grid == 1),
+                                       np.argwhere(env.grid == 1)))
+
+    def test_sparse_placement_is_uniform(self):
+        original = Environment_module.SPARSE_PLACEMENT_MIN_CELLS
+        Environment_module.SPARSE_PLACEMENT_MIN_CELLS = 0
+        try:
+            rng = np.random.default_rng(5)
+            hits = np.zeros((10, 10))
+            for _ in range(2000):
+                env = Environment(10)
+                env.place_bio_hazards(4, rng=rng)
+                hits += env.grid == 1
+        finally:
+            Environment_module.SPARSE_PLACEMENT_MIN_CELLS = original
+        interior = hits[1:9, 1:9]
+        self.assertEqual(hits.sum(), 8000)
+        self.assertEqual(hits[0].sum() + hits[:, 0].sum(), 0)
+        self.assertLess(interior.max() - interior.min(), 70)
+
+    def test_non_square_grid(self):
+        env = Environment((20, 150))
+        self.assertEqual(env.grid.shape, (20, 150))
+        self.assertTrue(np.all(env.grid[:, 149] == 2))
+        self.assertTrue(np.all(env.grid[19, :] == 2))
+        self.assertTrue(env.is_inside_grid((19, 149)))
+        self.assertFalse(env.is_inside_grid((20, 0)))
+        self.assertEqual(env.count_clean_areas(), 18 * 148)
+        env.place_bio_hazards(50)
+        self.assertEqual(env.count_bio_hazards(), 50)
+        self.assertTrue(all(env.is_bio_hazard(p) for p in env.get_bio_hazard_coordinates()))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+import Main
+from Agent import Agent
+from EpisodeArchive import ArchiveWriter, EpisodeArchive
+
+# python -m pytest -q tests/test_episode_archive.py
+
+
+def test_round_trip_matches_agent(tmp_path):
+    seeds = Main.episode_seeds(3, 4)
+    agents = [Main.simulate_episode(s) for s in seeds]
+    with ArchiveWriter(str(tmp_path), max_size=100) as writer:
+        for seed, agent in zip(seeds, agents):
+            writer.add(agent, seed=seed, size=100, bio_hazards=1000, humans=30, max_steps=1000)
+
+    archive = EpisodeArchive(str(tmp_path))
+    assert len(archive) == 4
+    assert archive.coord_dtype == np.int16
+    for i, (seed, agent) in enumerate(zip(seeds, agents)):
+        episode = archive.episode(i)
+        assert episode["seed"] == seed
+        assert episode["config"]["bio_hazards"] == 1000
+        assert episode["statistics"] == agent.get_statistics()
+        assert episode["human_encounters"] == agent.human_encounters
+        assert [tuple(p) for p in episode["path"].tolist()] == agent.get_path()
+        assert [tuple(p) for p in episode["collected"].tolist()] == agent.collected_positions
+        assert len(episode["collected"]) == agent.waste_collected
+
+
+def test_single_episode_is_memory_mapped(tmp_path):
+    agent = Main.simulate_episode(7)
+    with ArchiveWriter(str(tmp_path)) as writer:
+        writer.add(Agent((0, 0)), size=100)
+        writer.add(agent, seed=7, size=100)
+    archive = EpisodeArchive(str(tmp_path))
+    assert isinstance(archive.path(1), np.memmap)
+    assert len(archive.collected(0)) == 0
+
+
+def test_text_report_is_derivable(tmp_path):
+    agent = Main.simulate_episode(11)
+    with ArchiveWriter(str(tmp_path)) as writer:
+        writer.add(agent, seed=11, size=100, bio_hazards=1000, humans=30, max_steps=1000)
+    report = EpisodeArchive(str(tmp_path)).text_report(0)
+    assert report.startswith("===== BIO-HAZARD CLEANING AGENT SIMULATION REPORT =====")
+    assert "Total waste collected: %d" % agent.waste_collected in report
+    r, c = agent.get_path()[-1]
+    assert "%d: (%d, %d)" % (len(agent.get_path()), r, c) in report
+    assert report.rstrip().endswith("===== END OF REPORT =====")
+
+
+def test_wide_grids_use_int32_and_small_dtype_overflow_raises(tmp_path):
+    agent = Agent((40000, 5))
+    with ArchiveWriter(str(tmp_path / "wide"), max_size=50000) as writer:
+        writer.add(agent, size=50000)
+    assert EpisodeArchive(str(tmp_path / "wide")).path(0).tolist() == [[40000, 5]]
+
+    writer = ArchiveWriter(str(tmp_path / "narrow"), coord_dtype=np.int16)
+    with pytest.raises(ValueError):
+        writer.add(agent, size=50000)
+    writer.close()
+
+
+def test_mixed_and_non_square_sizes(tmp_path):
+    # without max_size the archive defaults to int32, so any size fits
+    with ArchiveWriter(str(tmp_path)) as writer:
+        writer.add(Agent((5, 5)), size=100)
+        writer.add(Agent((40000, 5)), size=50000)
+        writer.add(Agent((3, 200)), size=(10, 300))
+    archive = EpisodeArchive(str(tmp_path))
+    assert archive.coord_dtype == np.int32
+    assert [archive.episode(i)["config"]["size"] for i in range(3)] == [100, 50000, (10, 300)]
+    assert archive.path(1).tolist() == [[40000, 5]]
+    assert "- Environment size: 10x300" in archive.text_report(2)
+
+
+def test_run_archived_totals_match_episodes(tmp_path, capsys):
+    totals = Main.run_archived(str(tmp_path), runs=3, seed=2)
+    archive = EpisodeArchive(str(tmp_path))
+    assert totals[2] == int(archive.index["waste_collected"].sum())
+    assert "-- Number of object collected" in capsys.readouterr().out
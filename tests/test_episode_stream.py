@@ -0,0 +1,64 @@
+import random
+import numpy as np
+from Environment import Environment
+from Agent import Agent
+from Action import Action
+from Movement import Movement
+from Random import Random
+from episode_stream import (iter_steps, iter_trajectory, load_trajectory, TrajectoryWriter,
+                            MOVED, COLLECTED, STOPPED)
+
+# python -m pytest -q tests/test_episode_stream.py
+
+
+def _episode(seed, record_path=True):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(100)
+    env.place_bio_hazards(1000)
+    env.place_humans(30)
+    agent = Agent(env.nth_clean_cell(random.randrange(env.count_clean_areas())),
+                  record_path=record_path)
+    return env, agent, Random(agent, Action(), Movement(env, agent))
+
+
+def test_steps_follow_agent_path():
+    env, agent, rnd = _episode(1)
+    records = list(iter_steps(env, agent, rnd, max_steps=1000))
+    moved = [(r.row, r.col) for r in records if r.flags & MOVED]
+    assert moved == agent.get_path()[1:]
+    assert sum(1 for r in records if r.flags & COLLECTED) == agent.waste_collected
+    assert sum(r.encounters for r in records) == agent.human_encounters
+    assert records[-1].flags & STOPPED
+    assert [r.step for r in records] == list(range(1, len(records) + 1))
+
+
+def test_generator_is_lazy_and_bounded():
+    env, agent, rnd = _episode(2)
+    stream = iter_steps(env, agent, rnd, max_steps=5)
+    first = next(stream)
+    assert first.step == 1
+    assert agent.steps_taken <= 1
+    assert len(list(stream)) <= 4
+
+
+def test_spill_round_trip(tmp_path):
+    env, agent, rnd = _episode(3, record_path=False)
+    path = str(tmp_path / "steps.bin")
+    with TrajectoryWriter(path, chunk_size=16) as spill:
+        records = list(iter_steps(env, agent, rnd, max_steps=1000, spill=spill))
+    assert agent.get_path() == []
+
+    stored = load_trajectory(path)
+    assert len(stored) == len(records)
+    assert [tuple(r) for r in stored.tolist()] == [tuple(r) for r in records]
+    chunks = list(iter_trajectory(path, chunk_size=16))
+    assert all(len(c) <= 16 for c in chunks)
+    assert sum(len(c) for c in chunks) == len(records)
+
+
+def test_empty_spill_file(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    TrajectoryWriter(path).close()
+    assert len(load_trajectory(path)) == 0
+    assert list(iter_trajectory(path)) == []
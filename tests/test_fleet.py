@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from Environment import Environment
+from Fleet import Fleet
+
+# python -m pytest -q tests/test_fleet.py
+
+
+def _fleet(agents, seed=0):
+    rng = np.random.default_rng(seed)
+    env = Environment(100)
+    env.place_bio_hazards(1000, rng=rng)
+    env.place_humans(30, rng=rng)
+    picks = rng.choice(env.count_clean_areas(), agents, replace=False)
+    return env, Fleet(env, [env.nth_clean_cell(i) for i in picks], seed=seed)
+
+
+def test_agents_never_share_or_enter_blocked_cells():
+    env, fleet = _fleet(200)
+    blocked = (env.grid == 2) | (env.grid == 3)
+    for _ in range(100):
+        fleet.step()
+        assert len(set(fleet.get_positions())) == fleet.count
+        assert not blocked.reshape(-1)[fleet.positions].any()
+        assert fleet.occupied.sum() == fleet.count
+
+
+def test_every_hazard_is_credited_once():
+    env, fleet = _fleet(150, seed=3)
+    totals = fleet.run(500)
+    assert 1000 - env.count_bio_hazards() == totals["waste_collected"]
+    assert env.count_bio_hazards() == int(np.sum(env.grid == 1))
+    assert len(env._hazards()) == env.count_bio_hazards()
+    assert totals["steps_taken"] == int(fleet.visited_counts().sum()) - fleet.count
+    assert fleet.visited.nbytes == fleet.count * -(-env.grid.size // 8)
+    for agent, position in enumerate(fleet.get_positions()):
+        assert fleet.has_visited(agent, position)
+
+
+def test_same_cell_conflict_lets_one_agent_through():
+    env = Environment(10)
+    env.grid[1:9, 1:9] = 2
+    env.grid[1:4, 4] = 0
+    env.grid[2, 4] = 1
+    env.invalidate_caches()
+    # (1, 4) and (3, 4) both have (2, 4) as their only move
+    fleet = Fleet(env, [(1, 4), (3, 4)], seed=1)
+    assert fleet.step() == 1
+    assert sorted(fleet.waste_collected.tolist()) == [0, 1]
+    assert fleet.waits.sum() == 1
+    assert env.count_bio_hazards() == 0
+
+
+def test_fleet_is_reproducible_from_seed():
+    runs = [_fleet(50, seed=7)[1] for _ in range(2)]
+    for fleet in runs:
+        fleet.run(200)
+    assert np.array_equal(runs[0].positions, runs[1].positions)
+    assert runs[0].get_totals() == runs[1].get_totals()
+
+
+def test_starts_must_be_distinct_clean_cells():
+    env = Environment(20)
+    with pytest.raises(ValueError):
+        Fleet(env, [(5, 5), (5, 5)])
+    with pytest.raises(ValueError):
+        Fleet(env, [(0, 0)])
+
+
+def test_clean_cells_bulk_matches_clean_cell():
+    env = Environment(30)
+    env.place_bio_hazards(100, rng=np.random.default_rng(2))
+    hazards = env.get_bio_hazard_coordinates()
+    rows = [r for r, _ in hazards[:10]] + [hazards[0][0], 0, -1]
+    cols = [c for _, c in hazards[:10]] + [hazards[0][1], 0, 5]
+    env._hazards()
+    cleaned = env.clean_cells(rows, cols)
+    assert cleaned.tolist() == [True] * 10 + [False] * 3
+    assert env.count_bio_hazards() == 90 == int(np.sum(env.grid == 1))
+    assert len(env._hazards()) == 90
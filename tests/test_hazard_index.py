@@ -0,0 +1,78 @@
+import random
+import numpy as np
+from HazardIndex import HazardIndex
+from Environment import Environment
+
+# python -m pytest -q tests/test_hazard_index.py
+
+
+def _brute_nearest(coords, ar, ac):
+    return min(coords, key=lambda b: abs(b[0] - ar) + abs(b[1] - ac))
+
+
+def test_empty_index_returns_none():
+    index = HazardIndex(10, 10)
+    assert index.nearest((5, 5)) is None
+    assert len(index) == 0
+
+
+def test_add_remove_and_membership():
+    index = HazardIndex(40, 40, bucket_size=8)
+    index.add((3, 4))
+    index.add((3, 4))
+    assert len(index) == 1
+    assert (3, 4) in index
+    assert index.remove((3, 4))
+    assert not index.remove((3, 4))
+    assert (3, 4) not in index
+    assert index.buckets == {}
+
+
+def test_remove_many_matches_single_removes():
+    index = HazardIndex(40, 40, bucket_size=8)
+    index.add_many([(3, 4), (3, 5), (20, 20), (39, 39)])
+    assert index.remove_many([(3, 4), (20, 20), (20, 20), (1, 1)]) == 2
+    assert len(index) == 2
+    assert (3, 5) in index and (3, 4) not in index
+    assert index.remove_many(np.array([(3, 5), (39, 39)])) == 2
+    assert index.buckets == {} and len(index) == 0
+    assert index.remove_many([]) == 0
+
+
+def test_nearest_matches_min_with_ties():
+    rng = random.Random(11)
+    for density in (0.002, 0.05, 0.4):
+        grid = np.zeros((73, 73), dtype=int)
+        grid[np.random.default_rng(3).random((73, 73)) < density] = 1
+        coords = np.argwhere(grid == 1).tolist()
+        index = HazardIndex(73, 73, bucket_size=8)
+        index.add_many(coords)
+        for _ in range(200):
+            ar, ac = rng.randrange(73), rng.randrange(73)
+            assert index.nearest((ar, ac)) == _brute_nearest(coords, ar, ac)
+
+
+def test_environment_index_tracks_clean_and_place():
+    np.random.seed(2)
+    env = Environment(100)
+    env.place_bio_hazards(300)
+    assert env.nearest_bio_hazard((50, 20)) == _brute_nearest(
+        env.get_bio_hazard_coordinates(), 50, 20)
+
+    for pos in env.get_bio_hazard_coordinates()[:250]:
+        env.clean_cell(tuple(pos))
+    env.place_bio_hazards(40)
+    for ar, ac in ((30, 30), (5, 50), (90, 5)):
+        assert env.nearest_bio_hazard((ar, ac)) == _brute_nearest(
+            env.get_bio_hazard_coordinates(), ar, ac)
+
+    env.place_bio_hazards(0)
+    assert env.nearest_bio_hazard((50, 20)) is None
+
+
+def test_invalidate_caches_after_direct_grid_write():
+    env = Environment(20)
+    assert env.nearest_bio_hazard((10, 10)) is None
+    env.grid[4, 4] = 1
+    env.invalidate_caches()
+    assert env.nearest_bio_hazard((10, 10)) == [4, 4]
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import Main
+from Environment import Environment
+from HumanDynamics import HumanDynamics
+
+# python -m pytest -q tests/test_human_dynamics.py
+
+
+def _crowd(humans, seed=0, size=100):
+    rng = np.random.default_rng(seed)
+    env = Environment(size)
+    env.place_bio_hazards(size * 5, rng=rng)
+    env.place_humans(humans, rng=rng)
+    return env, rng
+
+
+@pytest.mark.parametrize("mode", ["random_walk", "waypoint"])
+def test_humans_move_without_collisions(mode):
+    env, rng = _crowd(400)
+    hazards = env.grid == 1
+    walls = env.grid == 2
+    env.is_near_human((5, 5))
+    dynamics = HumanDynamics(env, mode, rng=rng)
+    moved = 0
+    for _ in range(50):
+        before = dynamics.positions.copy()
+        moved += dynamics.step()
+        step = np.abs(np.subtract(*np.divmod(dynamics.positions, 100)) -
+                      np.subtract(*np.divmod(before, 100)))
+        assert np.all(np.isin(step, (0, 1)))
+        assert len(np.unique(dynamics.positions)) == 400
+        assert np.array_equal(np.sort(np.flatnonzero(env.grid == 3)),
+                              np.sort(dynamics.positions))
+    assert moved > 0
+    assert np.array_equal(env.grid == 1, hazards)
+    assert np.array_equal(env.grid == 2, walls)
+    cached = env._human_neighbours.copy()
+    env.invalidate_caches()
+    assert np.array_equal(env._human_adjacency(), cached)
+    assert env.count_bio_hazards() == int(hazards.sum())
+
+
+def test_waypoint_humans_reach_their_goal():
+    env = Environment(20)
+    env.grid[5, 5] = 3
+    env.invalidate_caches()
+    dynamics = HumanDynamics(env, "waypoint", rng=np.random.default_rng(1), patience=100)
+    goal = int(dynamics.waypoints[0])
+    distance = sum(abs(a - b) for a, b in zip(divmod(goal, 20), (5, 5)))
+    for _ in range(distance):
+        dynamics.step()
+    assert goal not in dynamics.waypoints or dynamics.positions[0] == goal
+    assert dynamics.stalled[0] == 0
+
+
+def test_avoid_keeps_humans_off_agent_cells():
+    env = Environment(10)
+    env.grid[1:9, 1:9] = 2
+    env.grid[2, 4] = 0
+    env.grid[1, 4] = 3
+    env.invalidate_caches()
+    dynamics = HumanDynamics(env, "random_walk", rng=np.random.default_rng(0))
+    for _ in range(20):
+        dynamics.step(avoid=[(2, 4)])
+    assert env.grid[2, 4] == 0
+
+
+def test_move_humans_claims_each_cell_once():
+    env = Environment(10)
+    env.grid[2, 2] = env.grid[2, 4] = 3
+    env.invalidate_caches()
+    moved = env.move_humans([(2, 2), (2, 4), (2, 2), (5, 5)], [(2, 3), (2, 3), (3, 2), (5, 6)])
+    assert moved.tolist() == [True, False, False, False]
+    assert env.grid[2, 3] == 3 and env.grid[2, 2] == 0 and env.grid[2, 4] == 3
+
+
+def test_episode_with_moving_humans_is_reproducible():
+    first = Main.run_episode(5, human_motion="random_walk")
+    assert first == Main.run_episode(5, human_motion="random_walk")
+    predrawn = Main.simulate_episode(5, human_motion="waypoint", predrawn=True)
+    again = Main.simulate_episode(5, human_motion="waypoint", predrawn=True)
+    assert predrawn.get_path() == again.get_path()
+    with pytest.raises(ValueError):
+        HumanDynamics(Environment(10), "teleport")
@@ -0,0 +1,48 @@
+import Main
+from instrumentation import Instrumentation, STATS
+
+# python -m pytest -q tests/test_instrumentation.py
+
+
+def test_counters_and_histogram():
+    stats = Instrumentation()
+    stats.count("a")
+    stats.count("a", 4)
+    stats.record("t", 0)
+    stats.record("t", 1000)
+    stats.record("t", 1500)
+    snap = stats.snapshot()
+    assert snap["counters"] == {"a": 5}
+    timer = snap["timers"]["t"]
+    assert timer["calls"] == 3
+    assert timer["total_ns"] == 2500
+    assert timer["max_ns"] == 1500
+    assert timer["histogram"] == {"<1": 1, "<1024": 1, "<2048": 1}
+    assert stats.timed("u", max, 2, 3) == 3
+    assert stats.snapshot()["timers"]["u"]["calls"] == 1
+    stats.reset()
+    assert stats.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_disabled_by_default_records_nothing():
+    STATS.reset()
+    Main.run_episode(3)
+    assert not STATS.enabled
+    assert STATS.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_main_run_instrumented(capsys):
+    totals = Main.run(5, instrument=True)
+    out = capsys.readouterr().out
+    assert "-- Instrumentation:" in out
+    assert not STATS.enabled
+    snap = STATS.snapshot()
+    counters = snap["counters"]
+    assert counters["random.steps"] == snap["timers"]["random.perform_random_move"]["calls"]
+    assert counters["movement.accept"] > 0
+    assert counters["environment.is_near_human"] >= counters["random.steps"]
+    assert counters.get("environment.clean_cell", 0) == totals[2]
+    encounters = snap["timers"].get("human_avoidance.handle_human_encounter", {"calls": 0})
+    assert encounters["calls"] == totals[0]
+    assert counters.get("human_avoidance.detour", 0) == totals[1]
+    STATS.reset()
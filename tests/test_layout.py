@@ -0,0 +1,55 @@
+import numpy as np
+from Environment import Environment
+from Layout import Layout
+
+# python -m pytest -q tests/test_layout.py
+
+
+def test_layout_matches_fresh_environment():
+    layout = Layout(100)
+    env = layout.create_environment()
+    assert np.array_equal(env.grid, Environment(100).grid)
+    assert env.grid.flags.writeable
+    assert not layout.grid.flags.writeable
+    assert len(layout.free_cells) == np.sum(layout.grid == 0)
+
+
+def test_layout_placement_matches_argwhere_placement():
+    layout = Layout(100)
+    np.random.seed(9)
+    fresh = Environment(100)
+    fresh.place_bio_hazards(1000)
+    fresh.place_humans(30)
+    np.random.seed(9)
+    env = layout.create_environment(debug=True)
+    env.place_bio_hazards(1000)
+    env.place_humans(30)
+    assert np.array_equal(env.grid, fresh.grid)
+    assert env.get_clean_area_coordinates() == fresh.get_clean_area_coordinates()
+    assert env.count_bio_hazards() == 1000
+    assert env.count_clean_areas() == fresh.count_clean_areas()
+    assert np.array_equal(env.human_adjacency_mask(), fresh.human_adjacency_mask())
+
+
+def test_pool_recycles_and_resets_environments():
+    layout = Layout(50)
+    env = layout.acquire()
+    env.place_bio_hazards(100)
+    env.place_humans(10)
+    env.clean_cell(tuple(env.get_bio_hazard_coordinates()[0]))
+    layout.release(env)
+
+    again = layout.acquire()
+    assert again is env
+    assert np.array_equal(again.grid, layout.grid)
+    assert again.count_bio_hazards() == 0
+    assert again.nearest_bio_hazard((25, 25)) is None
+    assert not again.human_adjacency_mask().any()
+    assert layout.acquire() is not env
+
+
+def test_layout_leaves_obstacle_array_writable():
+    plan = Environment(30).grid.copy()
+    layout = Layout(None, obstacles=plan)
+    assert plan.flags.writeable and not layout.grid.flags.writeable
+    assert np.array_equal(layout.grid, plan)
@@ -0,0 +1,94 @@
+import numpy as np
+import Main
+
+# python -m pytest -q tests/test_main.py
+
+
+def test_run_episode_is_reproducible_from_seed():
+    assert Main.run_episode(1234) == Main.run_episode(1234)
+
+
+def test_episode_seeds_are_distinct_and_stable():
+    seeds = Main.episode_seeds(0, 50)
+    assert len(set(seeds)) == 50
+    assert seeds == Main.episode_seeds(0, 50)
+    assert seeds[:10] == Main.episode_seeds(0, 10)
+    assert seeds[20:27] == Main.episode_seeds(0, 7, start=20)
+    children = np.random.SeedSequence([0, 1]).spawn(5)
+    assert Main.episode_seeds([0, 1], 5) == [int(c.generate_state(1)[0]) for c in children]
+
+
+def test_run_parallel_independent_of_worker_count():
+    serial = [Main.run_episode(s) for s in Main.episode_seeds(5, 12)]
+    expected = tuple(sum(col) for col in zip(*serial))
+    assert Main.run_parallel(12, workers=1, seed=5) == expected
+    assert Main.run_parallel(12, workers=3, seed=5) == expected
+
+
+def test_run_reports_totals(capsys):
+    totals = Main.run(3)
+    out = capsys.readouterr().out
+    assert "-- Number of object collected: %d" % totals[2] in out
+
+
+def test_predrawn_episode_reproducible_from_one_seed():
+    import random
+    import numpy as np
+    random.seed(0)
+    np.random.seed(0)
+    first = Main.simulate_episode(42, predrawn=True)
+    # the global generators are neither used nor reseeded
+    assert random.random() == random.Random(0).random()
+    second = Main.simulate_episode(42, predrawn=True)
+    assert first.get_path() == second.get_path()
+    assert first.collected_positions == second.collected_positions
+    assert Main.simulate_episode(43, predrawn=True).get_path() != first.get_path()
+
+
+def test_predrawn_orders_are_permutations_drawn_in_blocks():
+    import numpy as np
+    from Action import Action
+    from Agent import Agent
+    from Environment import Environment
+    from Movement import Movement
+    from Random import Random
+    env = Environment(20)
+    agent = Agent((5, 5))
+    rnd = Random(agent, Action(), Movement(env, agent), rng=np.random.default_rng(1), steps=8)
+    assert len(rnd.permutations) == 24
+    expected = np.random.default_rng(1).integers(0, 24, 8).tolist()
+    orders = [rnd._action_order() for _ in range(10)]
+    assert orders[:8] == [rnd.permutations[k] for k in expected]
+    assert all(sorted(order) == sorted(Action.actions) for order in orders)
+
+
+def test_running_stats_matches_numpy():
+    import numpy as np
+    from RunningStats import RunningStats
+    data = np.random.default_rng(0).normal(5, 2, size=(200, 3))
+    stats = RunningStats(("a", "b", "c"))
+    for row in data:
+        stats.add(row.tolist())
+    assert np.allclose(list(stats.mean().values()), data.mean(axis=0))
+    assert np.allclose(list(stats.variance().values()), data.var(axis=0, ddof=1))
+    width = 2 * 1.959964 * data.std(axis=0, ddof=1) / np.sqrt(200)
+    assert np.allclose(list(stats.ci_width(0.95).values()), width, rtol=1e-5)
+
+
+def test_run_adaptive_stops_at_target_width(capsys):
+    result = Main.run_adaptive(ci_width=6.0, max_runs=500, seed=3)
+    assert result["converged"]
+    assert 10 <= result["episodes"] < 500
+    assert all(w <= 6.0 for w in result["ci_width"].values())
+    seeds = Main.episode_seeds(3, result["episodes"])
+    expected = [Main.run_episode(s) for s in seeds]
+    assert result["totals"] == tuple(sum(col) for col in zip(*expected))
+    assert "-- Episodes used: %d" % result["episodes"] in capsys.readouterr().out
+
+
+def test_run_adaptive_respects_max_runs(capsys):
+    result = Main.run_adaptive(ci_width={"human_encounters": 0.01, "alternative_paths_used": 10,
+                                         "waste_collected": 10}, max_runs=15, seed=1)
+    assert not result["converged"]
+    assert result["episodes"] == 15
+    assert "(max_runs reached)" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import random
+import numpy as np
+from Environment import Environment
+from Agent import Agent
+from Action import Action
+from Movement import Movement
+from Random import Random
+from NeighbourTable import NeighbourTable, OUTSIDE, BLOCKED
+
+# python -m pytest -q tests/test_neighbour_table.py
+
+
+def test_table_entries():
+    env = Environment(10)
+    env.grid[3, 4] = 2
+    table = NeighbourTable(env.grid, Action.actions)
+    here = table.index((3, 3))
+    assert table.neighbour(here, "MOVE_UP") == table.index((2, 3))
+    assert table.neighbour(here, "MOVE_RIGHT") == BLOCKED
+    corner = table.index((0, 0))
+    assert table.neighbour(corner, "MOVE_UP") == OUTSIDE
+    assert table.neighbour(corner, "MOVE_LEFT") == OUTSIDE
+    assert table.neighbour(corner, "MOVE_DOWN") == BLOCKED
+    assert table.position(table.index((7, 2))) == (7, 2)
+
+
+def test_table_handles_non_square_layouts():
+    table = NeighbourTable(np.zeros((3, 5), dtype=int), Action.actions)
+    here = table.index((2, 4))
+    assert table.neighbour(here, "MOVE_DOWN") == OUTSIDE
+    assert table.neighbour(here, "MOVE_RIGHT") == OUTSIDE
+    assert table.position(table.neighbour(here, "MOVE_UP")) == (1, 4)
+
+
+def _walk(seed, use_table, predrawn=False, compact=False):
+    random.seed(seed)
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed) if predrawn else None
+    env = Environment(100)
+    env.place_bio_hazards(1000)
+    env.place_humans(300)
+    start = tuple(random.choice(env.get_clean_area_coordinates()))
+    agent = Agent(start, grid_shape=env.grid.shape if compact else None)
+    table = NeighbourTable(env.grid, Action.actions) if use_table else None
+    rnd = Random(agent, Action(), Movement(env, agent), neighbour_table=table, rng=rng)
+    while agent.active and agent.steps_taken < 1000:
+        if not rnd.perform_random_move():
+            break
+    return (agent.get_path(), agent.get_statistics(), agent.human_encounters,
+            agent.alternative_paths_used, env.get_grid().tolist())
+
+
+def test_table_moves_match_default_rules():
+    for seed in range(15):
+        assert _walk(seed, True) == _walk(seed, False)
+
+
+def test_table_moves_match_with_predrawn_orders_and_bitmap():
+    for seed in range(10):
+        assert _walk(seed, True, predrawn=True) == _walk(seed, False, predrawn=True)
+        assert _walk(seed, True, compact=True) == _walk(seed, False)
+
+
+def test_table_moves_on_wide_obstacle_map(tmp_path):
+    # np.save keeps an int array's default int64, 8 bytes per cell
+    np.save(tmp_path / "plan.npy", Environment(30).grid.astype(np.int64))
+    plan = np.load(tmp_path / "plan.npy")
+    from Layout import Layout
+    layout = Layout(None, obstacles=plan)
+    paths = []
+    for table in (layout.neighbour_table(), None):
+        rng = np.random.default_rng(2)
+        env = layout.create_environment()
+        assert env.grid.dtype == np.int64
+        env.place_bio_hazards(40, rng)
+        env.place_humans(20, rng)
+        agent = Agent(env.nth_clean_cell(0))
+        rnd = Random(agent, Action(), Movement(env, agent), neighbour_table=table, rng=rng)
+        while agent.active and agent.steps_taken < 300:
+            if not rnd.perform_random_move():
+                break
+        paths.append((agent.get_path(), env.get_grid().tolist()))
+    assert paths[0] == paths[1]
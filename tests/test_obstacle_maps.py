@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+import obstacle_maps
+from Agent import Agent
+from Layout import Layout
+from Movement import Movement
+from obstacle_maps import load_obstacle_map, load_environment
+
+# python -m pytest -q tests/test_obstacle_maps.py
+
+TEXT_MAP = """\
+##########
+#....#...#
+#.*..#.H.#
+#........#
+##########
+"""
+
+
+def test_text_map_codes_and_shape(tmp_path):
+    path = tmp_path / "floor.txt"
+    path.write_text(TEXT_MAP)
+    env = load_environment(str(path))
+    assert env.grid.shape == (5, 10)
+    assert (env.rows, env.cols) == (5, 10)
+    assert env.count_bio_hazards() == 1
+    assert env.is_human((2, 7))
+    assert env.count_inaccessible_areas() == 2 * 10 + 2 * 3 + 2
+    assert env.is_inside_grid((4, 9))
+    assert not env.is_inside_grid((5, 0))
+    assert not env.is_inside_grid((0, 10))
+
+
+def test_text_map_pads_short_rows(tmp_path):
+    path = tmp_path / "ragged.txt"
+    path.write_text("###\n#\n###\n")
+    assert load_obstacle_map(str(path)).tolist() == [[2, 2, 2], [2, 0, 0], [2, 2, 2]]
+
+
+def test_npy_map_is_copy_on_write(tmp_path):
+    grid = np.zeros((30, 70), dtype=np.int8)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = 2
+    path = str(tmp_path / "floor.npy")
+    np.save(path, grid)
+    env = load_environment(path)
+    assert isinstance(env.grid, np.memmap)
+    assert env.count_clean_areas() == 28 * 68
+    assert env.place_bio_hazards(100) == 100
+    # placement wrote to private pages only; the file is unchanged
+    assert np.array_equal(np.load(path), grid)
+    assert all(env.is_bio_hazard(p) for p in env.get_bio_hazard_coordinates())
+    r, c = env.get_bio_hazard_coordinates()[0]
+    assert env.clean_cell((r, c))
+    assert env.count_bio_hazards() == 99
+
+
+def test_npy_bool_map_marks_true_inaccessible(tmp_path):
+    walls = np.zeros((4, 6), dtype=bool)
+    walls[:, 3] = True
+    path = str(tmp_path / "walls.npy")
+    np.save(path, walls)
+    grid = load_obstacle_map(path)
+    assert grid.tolist() == np.where(walls, 2, 0).tolist()
+
+
+def test_npy_map_rejects_non_grid(tmp_path):
+    path = str(tmp_path / "bad.npy")
+    np.save(path, np.zeros(5, dtype=np.int8))
+    with pytest.raises(ValueError):
+        load_obstacle_map(path)
+
+
+def test_npy_map_rejects_unknown_codes(tmp_path):
+    grid = np.zeros((4, 6), dtype=np.int64)
+    grid[2, 3] = 7
+    path = str(tmp_path / "codes.npy")
+    np.save(path, grid)
+    with pytest.raises(ValueError, match="0..3"):
+        load_obstacle_map(path)
+
+
+def test_wall_maps_convert_in_int8_bands(tmp_path, monkeypatch):
+    # a tiny chunk forces one row per band, across every map kind
+    monkeypatch.setattr(obstacle_maps, "COUNT_CHUNK_CELLS", 5)
+    walls = np.zeros((7, 11), dtype=bool)
+    walls[::2, 3] = walls[5, :] = True
+    path = str(tmp_path / "walls.npy")
+    np.save(path, walls)
+    pbm = tmp_path / "walls.pbm"
+    pbm.write_bytes(b"P4\n11 7\n" + np.packbits(walls.astype(np.uint8), axis=1).tobytes())
+    for source in (path, str(pbm)):
+        grid = load_obstacle_map(source)
+        assert grid.dtype == np.int8
+        assert grid.tolist() == np.where(walls, 2, 0).tolist()
+
+
+def test_netpbm_maps(tmp_path):
+    pixels = np.full((3, 9), 255, dtype=np.uint8)
+    pixels[1, 4] = 0
+    p5 = tmp_path / "floor.pgm"
+    p5.write_bytes(b"P5\n# floor\n9 3\n255\n" + pixels.tobytes())
+    p2 = tmp_path / "ascii.pgm"
+    p2.write_text("P2\n9 3 255\n" + "\n".join(" ".join(map(str, row)) for row in pixels))
+    p4 = tmp_path / "floor.pbm"
+    bits = (pixels == 0).astype(np.uint8)
+    p4.write_bytes(b"P4\n9 3\n" + np.packbits(bits, axis=1).tobytes())
+    p1 = tmp_path / "ascii.pbm"
+    p1.write_text("P1\n9 3\n" + "\n".join("".join(map(str, row)) for row in bits))
+
+    expected = np.where(pixels == 0, 2, 0).tolist()
+    for path in (p5, p2, p4, p1):
+        assert load_obstacle_map(str(path)).tolist() == expected, path
+
+
+def test_non_square_environment_placement_and_movement(tmp_path):
+    path = tmp_path / "corridor.txt"
+    path.write_text("#" * 40 + "\n" + "#" + "." * 38 + "#\n" + "#" * 40 + "\n")
+    env = load_environment(str(path))
+    assert env.place_bio_hazards(10, rng=np.random.default_rng(0)) == 10
+    coords = env.get_clean_area_coordinates()
+    assert all(r == 1 for r, _ in coords)
+    assert env.nth_clean_cell(len(coords) - 1) == tuple(coords[-1])
+    assert env.nearest_bio_hazard((1, 1)) in env.get_bio_hazard_coordinates()
+
+    agent = Agent((1, 38))
+    mv = Movement(env, agent)
+    visited = agent.visited_positions
+    assert not mv.is_move_valid((1, 38), (1, 39), visited)
+    assert mv.is_move_valid((1, 38), (1, 37), visited)
+    assert not mv.is_move_valid((1, 38), (1, 40), visited)
+    assert agent.stop_reason == "Hit border"
+
+
+def test_layout_from_obstacle_map(tmp_path):
+    path = tmp_path / "floor.txt"
+    path.write_text(TEXT_MAP.replace("*", ".").replace("H", "."))
+    layout = Layout(None, obstacles=load_obstacle_map(str(path)))
+    env = layout.acquire()
+    assert env.grid.shape == (5, 10)
+    assert env.place_humans(3) == 3
+    layout.release(env)
+    assert int(np.sum(layout.acquire().grid == 3)) == 0
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import Main
+from simulation_server import SimulationServer, job_configs
+
+# python -m pytest -q tests/test_simulation_server.py
+
+
+async def _submit(connect, *jobs):
+    reader, writer = await connect()
+    for job in jobs:
+        writer.write((json.dumps(job) + "\n").encode())
+    writer.write_eof()
+    replies = [json.loads(line) for line in (await reader.read()).splitlines()]
+    writer.close()
+    return replies
+
+
+def _serve(client, path=None, **options):
+    async def scenario():
+        server = SimulationServer(workers=2, **options)
+        listener = await server.start(port=0, path=path)
+        try:
+            if path is None:
+                port = listener.sockets[0].getsockname()[1]
+                connect = lambda: asyncio.open_connection("127.0.0.1", port)  # noqa: E731
+            else:
+                connect = lambda: asyncio.open_unix_connection(path)  # noqa: E731
+            return await client(connect)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+    return asyncio.run(scenario())
+
+
+def test_concurrent_clients_stream_matching_episodes():
+    async def client(connect):
+        return await asyncio.gather(
+            _submit(connect, {"id": "a", "runs": 9, "seed": 1, "max_steps": 200}),
+            _submit(connect, {"id": "b", "runs": 5, "seed": 2}))
+
+    first, second = _serve(client, chunk_size=2, progress_every=4)
+    for replies, job, runs, seed, config in ((first, "a", 9, 1, {"max_steps": 200}),
+                                             (second, "b", 5, 2, {})):
+        assert all(r["job"] == job for r in replies)
+        assert replies[0]["event"] == "accepted"
+        assert replies[-1]["event"] == "done"
+        episodes = sorted((r for r in replies if r["event"] == "episode"),
+                          key=lambda r: r["index"])
+        seeds = Main.episode_seeds(seed, runs)
+        assert [r["seed"] for r in episodes] == seeds
+        expected = [Main.run_episode(s, **config) for s in seeds]
+        assert [(r["human_encounters"], r["alternative_paths_used"], r["waste_collected"])
+                for r in episodes] == expected
+        assert replies[-1]["totals"]["waste_collected"] == sum(e[2] for e in expected)
+        assert replies[-1]["totals"]["episodes"] == runs
+    assert [r["done"] for r in first if r["event"] == "progress"] == [4, 8]
+
+
+def test_sweep_over_unix_socket(tmp_path):
+    job = {"type": "sweep", "runs": 3, "seed": 4, "size": 50, "bio_hazards": 100,
+           "points": [{"humans": 0}, {"humans": 10}]}
+
+    async def client(connect):
+        return await _submit(connect, job)
+
+    replies = _serve(client, path=str(tmp_path / "sim.sock"))
+    done = replies[-1]
+    assert done["event"] == "done"
+    seeds = Main.episode_seeds(4, 6)
+    for k, humans in enumerate((0, 10)):
+        expected = [Main.run_episode(s, size=50, bio_hazards=100, humans=humans)
+                    for s in seeds[k * 3:k * 3 + 3]]
+        assert done["per_config"][k]["waste_collected"] == sum(e[2] for e in expected)
+
+
+def test_bad_jobs_report_errors_and_keep_the_connection():
+    async def client(connect):
+        reader, writer = await connect()
+        writer.write(b"not json\n")
+        writer.write(b'{"type": "sweep", "points": [{"colour": 1}]}\n')
+        writer.write(b'{"type": "episodes", "runs": 1, "seed": 0}\n')
+        writer.write_eof()
+        replies = [json.loads(line) for line in (await reader.read()).splitlines()]
+        writer.close()
+        return replies
+
+    replies = _serve(client)
+    assert [r["event"] for r in replies[:2]] == ["error", "error"]
+    assert "colour" in replies[1]["message"]
+    assert replies[-1]["event"] == "done"
+
+
+def test_job_configs():
+    assert job_configs({"runs": 3, "humans": 5}) == [{"humans": 5}]
+    assert job_configs({"type": "sweep", "humans": 5, "points": [{"size": 50}, {}]}) == [
+        {"humans": 5, "size": 50}, {"humans": 5}]
@@ -0,0 +1,117 @@
+import random
+import numpy as np
+from Action import Action
+from Agent import Agent
+from Environment import Environment
+from Movement import Movement
+from Random import Random
+from snapshot import (save_snapshot, load_snapshot, SharedSnapshot, attach_snapshot,
+                      run_branches, _continue_branch)
+
+# python -m pytest -q tests/test_snapshot.py
+
+
+def _mid_episode(seed, steps=10, compact=False):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = Environment(100)
+    env.place_bio_hazards(1000)
+    env.place_humans(30)
+    start = env.nth_clean_cell(random.randrange(env.count_clean_areas()))
+    agent = Agent(start, grid_shape=env.grid.shape if compact else None)
+    rnd = Random(agent, Action(), Movement(env, agent))
+    for _ in range(steps):
+        if not rnd.perform_random_move():
+            break
+    return env, agent
+
+
+def _finish(env, agent):
+    rnd = Random(agent, Action(), Movement(env, agent))
+    while agent.active and agent.steps_taken < 1000:
+        if not rnd.perform_random_move():
+            break
+    return agent.get_path(), agent.collected_positions, agent.get_statistics()
+
+
+def test_file_snapshot_resumes_identically(tmp_path):
+    for compact in (False, True):
+        env, agent = _mid_episode(3, compact=compact)
+        save_snapshot(str(tmp_path / str(compact)), env, agent)
+        expected = _finish(env, agent)
+
+        random.seed(999)
+        restored_env, restored_agent, rng = load_snapshot(str(tmp_path / str(compact)))
+        assert rng is None
+        assert isinstance(restored_env.grid, np.memmap)
+        assert restored_env.size == 100
+        assert restored_agent.waste_collected == 0 or restored_agent.collected_positions
+        assert _finish(restored_env, restored_agent) == expected
+        assert restored_env.count_bio_hazards() == int(np.sum(restored_env.grid == 1))
+
+
+def _predrawn_walk(agent, rnd, steps):
+    for _ in range(steps):
+        if not agent.active or not rnd.perform_random_move():
+            break
+    return agent.get_path(), agent.collected_positions, agent.get_statistics()
+
+
+def test_predrawn_snapshot_resumes_identically(tmp_path):
+    # the strategy holds a block of orders already drawn from rng, so the
+    # snapshot has to carry them for the resumed walk to match
+    rng = np.random.default_rng(21)
+    env = Environment(100)
+    env.place_bio_hazards(1000, rng)
+    env.place_humans(30, rng)
+    agent = Agent(env.nth_clean_cell(int(rng.integers(env.count_clean_areas()))))
+    rnd = Random(agent, Action(), Movement(env, agent), rng=rng, steps=50)
+    _predrawn_walk(agent, rnd, 5)
+    save_snapshot(str(tmp_path), env, agent, rng, strategy=rnd)
+    expected = _predrawn_walk(agent, rnd, 1000)
+
+    restored_env, restored_agent, restored_rng, state = load_snapshot(
+        str(tmp_path), return_strategy=True)
+    assert len(state["orders"]) == 45
+    resumed = Random(restored_agent, Action(), Movement(restored_env, restored_agent),
+                     rng=restored_rng)
+    resumed.set_state(state)
+    assert _predrawn_walk(restored_agent, resumed, 1000) == expected
+
+
+def test_restore_does_not_touch_the_saved_files(tmp_path):
+    env, agent = _mid_episode(5)
+    save_snapshot(str(tmp_path), env, agent)
+    before = np.load(str(tmp_path / "grid.npy"))
+    restored_env, restored_agent, _ = load_snapshot(str(tmp_path))
+    _finish(restored_env, restored_agent)
+    assert np.array_equal(np.load(str(tmp_path / "grid.npy")), before)
+
+
+def test_generator_state_round_trips(tmp_path):
+    rng = np.random.default_rng(12)
+    rng.random(5)
+    save_snapshot(str(tmp_path), Environment(10), rng=rng)
+    _, agent, restored = load_snapshot(str(tmp_path), restore_global=False)
+    assert agent is None
+    assert restored.random(3).tolist() == rng.random(3).tolist()
+
+
+def test_shared_snapshot_branches_are_private():
+    env, agent = _mid_episode(7)
+    with SharedSnapshot(env, agent) as shared:
+        first_env, first_agent, _ = attach_snapshot(shared.descriptor)
+        first_env.grid[:] = 2
+        second_env, second_agent, _ = attach_snapshot(shared.descriptor)
+        assert np.array_equal(second_env.grid, env.grid)
+        assert second_agent.get_path() == agent.get_path()
+        assert _continue_branch(shared.descriptor, 11, 1000) == \
+            _continue_branch(shared.descriptor, 11, 1000)
+
+
+def test_run_branches_matches_local_continuation():
+    env, agent = _mid_episode(9)
+    seeds = [1, 2, 3]
+    results = run_branches(env, agent, seeds, workers=2)
+    with SharedSnapshot(env, agent) as shared:
+        assert results == [_continue_branch(shared.descriptor, s, 1000) for s in seeds]
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pytest
+import Main
+import sweep
+
+# python -m pytest -q tests/test_sweep.py
+
+
+def _configs():
+    return sweep.expand_grid(sizes=(30, 50), bio_hazards=(20,), humans=(0, 5), max_steps=(200,))
+
+
+def test_expand_grid_covers_every_combination():
+    configs = _configs()
+    assert len(configs) == 4
+    assert {(c["size"], c["humans"]) for c in configs} == {(30, 0), (30, 5), (50, 0), (50, 5)}
+    assert len({sweep.cell_key(c) for c in configs}) == 4
+
+
+def test_sweep_rows_match_single_episodes(tmp_path):
+    configs = _configs()
+    assert sweep.run_sweep(str(tmp_path), configs, runs=3, seed=1, workers=2) == 4
+    results = sweep.load_results(str(tmp_path))
+    assert len(results["seed"]) == 12
+    for i in range(12):
+        config = {name: int(results[name][i]) for name in sweep.PARAMETERS}
+        agent = Main.simulate_episode(int(results["seed"][i]), **config)
+        assert results["waste_collected"][i] == agent.waste_collected
+        assert results["steps_taken"][i] == agent.steps_taken
+
+
+def test_episodes_without_a_start_cell_are_marked_skipped(tmp_path):
+    # 64 hazards fill every clean cell of the 10x10 floor plan
+    configs = sweep.expand_grid(sizes=(10,), bio_hazards=(64, 10), humans=(0,), max_steps=(50,))
+    sweep.run_sweep(str(tmp_path), configs, runs=2, workers=1)
+    results = sweep.load_results(str(tmp_path))
+    full = results["bio_hazards"] == 64
+    assert results["skipped"][full].all()
+    assert not results["skipped"][~full].any()
+    assert (results["steps_taken"][full] == 0).all()
+
+
+def test_resume_skips_finished_cells(tmp_path, monkeypatch):
+    configs = _configs()
+    sweep.run_sweep(str(tmp_path), configs[:2], runs=2, workers=1)
+    done = {name: os.path.getmtime(str(tmp_path / name)) for name in os.listdir(str(tmp_path))
+            if name.endswith(".npz")}
+    assert len(sweep.pending_cells(str(tmp_path), configs)) == 2
+
+    ran = []
+    original = sweep._run_cell
+    monkeypatch.setattr(sweep, "_run_cell", lambda c, r, s: ran.append(c) or original(c, r, s))
+    assert sweep.run_sweep(str(tmp_path), configs, runs=2, workers=1) == 2
+    assert ran == configs[2:]
+    for name, mtime in done.items():
+        assert os.path.getmtime(str(tmp_path / name)) == mtime
+    assert sweep.run_sweep(str(tmp_path), configs, runs=2, workers=1) == 0
+    assert len(sweep.load_results(str(tmp_path))["episode"]) == 8
+
+
+def test_partial_shards_are_ignored_and_settings_are_checked(tmp_path):
+    configs = _configs()[:1]
+    sweep.run_sweep(str(tmp_path), configs, runs=2, workers=1)
+    (tmp_path / "cell-0000.npz.partial").write_bytes(b"truncated")
+    assert set(sweep.load_results(str(tmp_path))["size"].tolist()) == {30}
+    with pytest.raises(ValueError):
+        sweep.run_sweep(str(tmp_path), configs, runs=3, workers=1)
+
+
+def test_cell_seeds_do_not_depend_on_grid_order(tmp_path):
+    configs = _configs()
+    sweep.run_sweep(str(tmp_path / "a"), configs, runs=2, workers=1)
+    sweep.run_sweep(str(tmp_path / "b"), configs[::-1][:1], runs=2, workers=1)
+    a, b = sweep.load_results(str(tmp_path / "a")), sweep.load_results(str(tmp_path / "b"))
+    rows = np.flatnonzero((a["size"] == 50) & (a["humans"] == 5))
+    assert a["seed"][rows].tolist() == b["seed"].tolist()
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Action import Action
+from Agent import Agent
+from Environment import Environment
+from Movement import Movement
+from Random import Random
+from TiledEnvironment import TiledEnvironment
+
+
+@pytest.mark.parametrize("size", [10, 100, (150, 230)])
+def test_floor_plan_matches_dense_environment(size):
+    dense = Environment(size)
+    tiled = TiledEnvironment(size, debug=True, tile_size=16)
+    assert np.array_equal(tiled.to_dense(), dense.grid)
+    assert tiled.count_inaccessible_areas() == dense.count_inaccessible_areas()
+    assert tiled.count_clean_areas() == dense.count_clean_areas()
+    assert tiled.count_accessible_areas() == dense.count_accessible_areas()
+
+
+def test_uniform_tiles_are_not_allocated():
+    tiled = TiledEnvironment(100, tile_size=10)
+    # the 26x26 room at rows/cols 35..60 covers tiles (4..5, 4..5) entirely
+    assert (4, 4) not in tiled._tiles and tiled._uniform[(4, 4)] == 2
+    # tile (2, 5) lies in open floor and is clean without being stored
+    assert (2, 5) not in tiled._tiles and (2, 5) not in tiled._uniform
+    assert tiled.is_clean((25, 55)) and not tiled.is_accessible((50, 50))
+
+
+def test_placement_cleaning_and_clearing():
+    tiled = TiledEnvironment(100, debug=True, tile_size=16)
+    rng = np.random.default_rng(3)
+    assert tiled.place_bio_hazards(200, rng) == 200
+    assert tiled.place_humans(20, rng) == 20
+    hazards = tiled.get_bio_hazard_coordinates()
+    assert len(hazards) == tiled.count_bio_hazards() == 200
+    assert hazards == sorted(hazards)
+    grid = tiled.to_dense()
+    assert all(grid[r, c] == 1 for r, c in hazards)
+    assert np.count_nonzero(grid == 3) == 20
+
+    r, c = hazards[0]
+    assert tiled.nearest_bio_hazard((r, c)) == [r, c]
+    assert tiled.clean_cell((r, c)) and not tiled.clean_cell((r, c))
+    assert tiled.count_bio_hazards() == 199
+
+    human = tuple(np.argwhere(grid == 3)[0])
+    assert tiled.is_human(human)
+    assert tiled.is_near_human((human[0], human[1] + 1)) or not tiled.is_inside_grid(
+        (human[0], human[1] + 1))
+
+    assert tiled.place_bio_hazards(0) == 0 and tiled.place_humans(0) == 0
+    assert tiled.count_bio_hazards() == 0 and tiled.nearest_bio_hazard((50, 50)) is None
+    assert tiled.count_clean_areas() == Environment(100).count_clean_areas()
+
+
+def test_obstacle_map_is_read_into_tiles(tmp_path):
+    grid = np.zeros((70, 90), dtype=np.int8)
+    grid[:, :32] = 2
+    grid[40, 60] = 1
+    grid[41, 60] = 3
+    path = tmp_path / "plan.npy"
+    np.save(path, grid)
+    tiled = TiledEnvironment(None, debug=True, obstacles=np.load(path, mmap_mode="r"),
+                             tile_size=16)
+    assert np.array_equal(tiled.to_dense(), grid)
+    assert tiled.count_inaccessible_areas() == 70 * 32
+    assert tiled.nearest_bio_hazard((0, 89)) == [40, 60]
+    assert tiled.is_near_human((40, 60))
+    # only the tiles holding the hazard and the human are allocated
+    assert tiled.allocated_tiles() == 1
+
+
+def test_agent_on_giant_map_allocates_only_around_its_path():
+    n = 100_000
+    tiled = TiledEnvironment(n)
+    border = 4 * n - 4
+    rooms = Environment(200).count_inaccessible_areas() - (4 * 200 - 4)
+    assert tiled.count_inaccessible_areas() == border + rooms
+    baseline = tiled.allocated_tiles()
+
+    rng = np.random.default_rng(0)
+    tiled.place_bio_hazards(1000, rng)
+    tiled.place_humans(30, rng)
+    agent = Agent(tiled.random_clean_cell(rng))
+    rnd = Random(agent, Action(), Movement(tiled, agent), rng=rng)
+    for _ in range(1000):
+        if not agent.active or not rnd.perform_random_move():
+            break
+    assert tiled.count_bio_hazards() == 1000 - agent.waste_collected
+    # hazards and humans each touch at most one tile, the path a few more
+    assert tiled.allocated_tiles() <= baseline + 1030 + 40
+    assert tiled.allocated_bytes() < 64 << 20
+
+
+@pytest.mark.parametrize("size", [60, (90, 130), 300])
+def test_dense_placement_matches_dense_environment(size):
+    # placements too dense for rejection sampling choose among the clean
+    # cells in row-major order, exactly as Environment does
+    dense = Environment(size)
+    tiled = TiledEnvironment(size, debug=True, tile_size=16)
+    for env in (dense, tiled):
+        rng = np.random.default_rng(5)
+        env.place_humans(40, rng)
+        assert env.place_bio_hazards(env.count_clean_areas(), rng) > 0
+        assert env.count_clean_areas() == 0
+    assert np.array_equal(tiled.to_dense(), dense.grid)